@@ -0,0 +1,310 @@
+"""Нагрузочный прогон страниц постов через тестовый клиент Django.
+
+Каждая страница запрашивается многократно со случайными параметрами
+(группа, автор, пост) из текущей базы. Для каждого маршрута считаются
+задержки p50/p95/p99 и среднее число запросов к базе.
+
+Параллельный прогон смешивает чтение лент с записью постов и
+комментариев в нескольких воркерах и сравнивает пропускную способность
+SQLite с настройками по умолчанию и с настройками из settings.
+"""
+import json
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from itertools import repeat
+
+from core.db import read_alias
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from posts.models import AuthorStats, Group, Post
+
+ROUTES = (
+    "posts:index",
+    "posts:group_list",
+    "posts:profile",
+    "posts:post_detail",
+    "posts:follow_index",
+)
+SAMPLES = 20
+# Небольшой рост задержки на шумной машине - не регрессия; среднее
+# число запросов немного плавает из-за случайной выборки страниц
+LATENCY_SLACK_MS = 5
+QUERY_SLACK = 0.5
+# Адрес не из INTERNAL_IPS: debug_toolbar не участвует в замерах
+CLIENT_ADDR = "10.0.0.1"
+
+# Режимы параллельного прогона: plain - SQLite по умолчанию (журнал
+# отката, synchronous=FULL, все читают из default), tuned - settings
+MODES = {
+    "plain": {
+        "SQLITE_PRAGMAS": {
+            "journal_mode": "delete",
+            "synchronous": "full",
+            "mmap_size": 0,
+            "cache_size": -2000,
+        },
+        "DATABASE_READ_ALIAS": None,
+    },
+    "tuned": {},
+}
+CONCURRENT_ROUTES = (
+    "posts:index",
+    "posts:group_list",
+    "posts:profile",
+    "posts:post_detail",
+    "posts:follow_index",
+)
+
+
+def percentile(values, q):
+    """Значение по рангу (nearest-rank) для q от 0 до 100."""
+    ordered = sorted(values)
+    rank = max(1, round(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _urls():
+    """Случайные адреса для каждого маршрута из текущей базы."""
+    posts = list(
+        Post.objects.order_by("?").values_list("pk", "author__username")[
+            :SAMPLES
+        ]
+    )
+    groups = list(
+        Group.objects.order_by("?").values_list("slug", flat=True)[:SAMPLES]
+    )
+    return {
+        "posts:index": [reverse("posts:index")],
+        "posts:group_list": [
+            reverse("posts:group_list", args=[slug]) for slug in groups
+        ],
+        "posts:profile": [
+            reverse("posts:profile", args=[username]) for _, username in posts
+        ],
+        "posts:post_detail": [
+            reverse("posts:post_detail", args=[pk]) for pk, _ in posts
+        ],
+        "posts:follow_index": [reverse("posts:follow_index")],
+    }
+
+
+def _reader():
+    """Пользователь с наибольшим числом подписок - для /follow/."""
+    stats = (
+        AuthorStats.objects.select_related("user")
+        .order_by("-following_count")
+        .first()
+    )
+    return stats.user if stats else None
+
+
+def run(requests=50, warmup=5, seed=None, routes=ROUTES, log=None):
+    """Прогоняет маршруты и возвращает метрики по каждому."""
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    urls = _urls()
+    client = Client(REMOTE_ADDR=CLIENT_ADDR)
+    reader_client = Client(REMOTE_ADDR=CLIENT_ADDR)
+    reader = _reader()
+    if reader is not None:
+        reader_client.force_login(reader)
+    results = {}
+    for route in routes:
+        if not urls[route] or route == "posts:follow_index" and not reader:
+            log(f"{route}: нет данных, пропущен")
+            continue
+        route_client = (
+            reader_client if route == "posts:follow_index" else client
+        )
+        latencies, queries = [], []
+        for number in range(warmup + requests):
+            url = rng.choice(urls[route])
+            # Чтение страниц идет через реплику, запись - в default
+            with ExitStack() as stack:
+                captured = [
+                    stack.enter_context(
+                        CaptureQueriesContext(connections[alias])
+                    )
+                    for alias in {DEFAULT_DB_ALIAS, read_alias()} - {None}
+                ]
+                start = time.perf_counter()
+                response = route_client.get(url)
+                elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise RuntimeError(f"{url}: ответ {response.status_code}")
+            if number >= warmup:
+                latencies.append(elapsed * 1000)
+                queries.append(sum(map(len, captured)))
+        results[route] = {
+            "requests": requests,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "queries": round(sum(queries) / len(queries), 2),
+        }
+        log(
+            f"{route}: p50 {results[route]['p50_ms']} мс, "
+            f"p95 {results[route]['p95_ms']} мс, "
+            f"p99 {results[route]['p99_ms']} мс, "
+            f"запросов {results[route]['queries']}"
+        )
+    return results
+
+
+def _worker(urls, post_ids, user, requests, write_ratio, seed):
+    """Запросы одного воркера; возвращает задержки и число ошибок."""
+    rng = random.Random(seed)
+    client = Client(REMOTE_ADDR=CLIENT_ADDR)
+    client.force_login(user)
+    latencies, errors = [], 0
+    try:
+        for number in range(requests):
+            start = time.perf_counter()
+            try:
+                if rng.random() >= write_ratio:
+                    response = client.get(rng.choice(urls))
+                elif number % 2:
+                    response = client.post(
+                        reverse("posts:post_create"),
+                        {"text": f"Нагрузочный пост {seed}-{number}"},
+                    )
+                else:
+                    response = client.post(
+                        reverse(
+                            "posts:add_comment", args=[rng.choice(post_ids)]
+                        ),
+                        {"text": f"Нагрузочный комментарий {seed}-{number}"},
+                    )
+                failed = response.status_code not in (200, 302)
+            except Exception:
+                # Например, «database is locked» после таймаута ожидания
+                failed = True
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += failed
+    finally:
+        # Соединения открыты самим воркером - закрываем их здесь
+        connections.close_all()
+    return latencies, errors
+
+
+def _executor(workers, processes):
+    if processes and "fork" in multiprocessing.get_all_start_methods():
+        # Процессы, как воркеры gunicorn: потоки одного процесса делят
+        # GIL и почти не соревнуются за блокировки базы. Открытые
+        # соединения закрываются до fork, чтобы их не унаследовали
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        )
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def run_concurrent(
+    workers=8,
+    requests=200,
+    write_ratio=0.1,
+    processes=True,
+    seed=None,
+    log=None,
+):
+    """Параллельный прогон: workers воркеров (процессов или потоков)
+    делят requests запросов, доля write_ratio - запись. Возвращает
+    пропускную способность и задержки.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    reader = _reader()
+    if reader is None:
+        raise RuntimeError("Нет пользователей для параллельного прогона")
+    routes = _urls()
+    urls = [url for route in CONCURRENT_ROUTES for url in routes[route]]
+    post_ids = list(Post.objects.values_list("pk", flat=True)[:SAMPLES])
+    shares = [
+        requests // workers + (number < requests % workers)
+        for number in range(workers)
+    ]
+    seeds = [rng.getrandbits(32) for _ in shares]
+    executor = _executor(workers, processes)
+    start = time.perf_counter()
+    # Вся запись идет от одного пользователя с одного адреса: без
+    # отключения лимитов почти все записи получили бы 429
+    with override_settings(RATE_LIMITS={}), executor:
+        outcomes = list(
+            executor.map(
+                _worker,
+                repeat(urls),
+                repeat(post_ids),
+                repeat(reader),
+                shares,
+                repeat(write_ratio),
+                seeds,
+            )
+        )
+    elapsed = time.perf_counter() - start
+    latencies = [value for outcome in outcomes for value in outcome[0]]
+    result = {
+        "workers": workers,
+        "requests": requests,
+        "errors": sum(outcome[1] for outcome in outcomes),
+        "rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+    log(
+        f"{result['rps']} запросов/с, p50 {result['p50_ms']} мс, "
+        f"p95 {result['p95_ms']} мс, ошибок {result['errors']}"
+    )
+    return result
+
+
+def compare_modes(modes=tuple(MODES), log=None, **kwargs):
+    """Параллельный прогон в каждом режиме из MODES."""
+    log = log or (lambda message: None)
+    results = {}
+    for mode in modes:
+        log(f"Режим {mode}:")
+        with override_settings(**MODES[mode]):
+            # PRAGMA применяются при открытии соединения
+            connections.close_all()
+            results[mode] = run_concurrent(log=log, **kwargs)
+        connections.close_all()
+    return results
+
+
+def compare(results, baseline, tolerance=1.25):
+    """Регрессии относительно базовой линии: рост p95 больше чем в
+    tolerance раз или рост числа запросов к базе.
+    """
+    regressions = []
+    for route, base in baseline.items():
+        current = results.get(route)
+        if current is None:
+            continue
+        limit = base["p95_ms"] * tolerance + LATENCY_SLACK_MS
+        if current["p95_ms"] > limit:
+            regressions.append(
+                f"{route}: p95 {current['p95_ms']} мс, "
+                f"базовая линия {base['p95_ms']} мс"
+            )
+        if current["queries"] > base["queries"] + QUERY_SLACK:
+            regressions.append(
+                f"{route}: запросов {current['queries']}, "
+                f"базовая линия {base['queries']}"
+            )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write("\n")
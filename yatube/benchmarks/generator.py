@@ -0,0 +1,174 @@
+"""Быстрая генерация синтетических данных для нагрузочных тестов.
+
+Группы создаются через mixer, тексты - через Faker, а пользователи,
+посты, подписки и комментарии вставляются пачками bulk_create в обход
+сигналов. После вставки счетчики, ленты и поисковый индекс
+пересобираются целиком, а общая метка изменения страниц сдвигается.
+"""
+import random
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
+from faker import Faker
+from mixer.backend.django import mixer
+from posts import counters, feed, search, stamps
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Тексты берутся из заранее сгенерированного набора: Faker слишком
+# медленный, чтобы вызывать его на каждый из миллиона постов
+TEXT_POOL = 1000
+
+WORKING_DATABASE = (
+    "В рабочей базе уже есть посты. Укажите отдельную базу в переменной "
+    "окружения YATUBE_DATABASE или запустите с --force"
+)
+
+
+def _last_pk(model):
+    return model.objects.aggregate(last=Max("pk"))["last"] or 0
+
+
+def _batches(objects, size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def is_working_database():
+    """Настроена база по умолчанию, и в ней уже есть данные."""
+    return (
+        settings.DATABASE_PATH == settings.DEFAULT_DATABASE_PATH
+        and Post.objects.exists()
+    )
+
+
+def generate(
+    users=100,
+    posts=1000,
+    follows=1000,
+    comments=1000,
+    groups=10,
+    batch_size=1000,
+    seed=None,
+    index=True,
+    log=None,
+):
+    """Создает данные и возвращает число созданных объектов по типам."""
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    faker = Faker("ru_RU")
+    faker.seed_instance(seed)
+    texts = [faker.text(max_nb_chars=300) for _ in range(TEXT_POOL)]
+    prefix = uuid.UUID(int=rng.getrandbits(128)).hex[:8]
+
+    def bulk(model, objects, **kwargs):
+        for batch in _batches(objects, batch_size):
+            model.objects.bulk_create(batch, **kwargs)
+
+    with transaction.atomic():
+        group_ids = []
+        if groups:
+            group_ids = [
+                group.pk
+                for group in mixer.cycle(groups).blend(
+                    Group, slug=mixer.sequence(f"{prefix}-{{0}}")
+                )
+            ]
+        log(f"Группы: {len(group_ids)}")
+
+        first_user = _last_pk(User) + 1
+        bulk(
+            User,
+            (
+                User(
+                    username=f"{prefix}_{number}",
+                    first_name=faker.first_name(),
+                    last_name=faker.last_name(),
+                    password="!",
+                )
+                for number in range(users)
+            ),
+        )
+        user_ids = list(
+            User.objects.filter(pk__gte=first_user).values_list(
+                "pk", flat=True
+            )
+        )
+        log(f"Пользователи: {len(user_ids)}")
+
+        first_post = _last_pk(Post) + 1
+        bulk(
+            Post,
+            (
+                Post(
+                    text=rng.choice(texts),
+                    author_id=rng.choice(user_ids),
+                    group_id=rng.choice(group_ids)
+                    if group_ids and rng.random() < 0.5
+                    else None,
+                )
+                for _ in range(posts)
+            ),
+        )
+        last_post = _last_pk(Post)
+        log(f"Посты: {posts}")
+
+        # Подписки на «популярных» авторов чаще: распределение Парето
+        pairs = set()
+        limit = len(user_ids) * (len(user_ids) - 1)
+        while len(pairs) < min(follows, limit):
+            user_id = rng.choice(user_ids)
+            author = min(int(rng.paretovariate(1.2)) - 1, len(user_ids) - 1)
+            author_id = user_ids[author]
+            if user_id != author_id:
+                pairs.add((user_id, author_id))
+        bulk(
+            Follow,
+            (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in pairs
+            ),
+            ignore_conflicts=True,
+        )
+        log(f"Подписки: {len(pairs)}")
+
+        if last_post >= first_post:
+            bulk(
+                Comment,
+                (
+                    Comment(
+                        text=rng.choice(texts),
+                        author_id=rng.choice(user_ids),
+                        post_id=rng.randint(first_post, last_post),
+                    )
+                    for _ in range(comments)
+                ),
+            )
+        log(f"Комментарии: {comments}")
+
+        authors, posts_fixed, groups_fixed = counters.recount()
+        log(
+            f"Счетчики: авторы - {authors}, посты - {posts_fixed}, "
+            f"группы - {groups_fixed}"
+        )
+        log(f"Записи лент: {feed.rebuild()}")
+        if index:
+            log(f"Проиндексировано постов: {search.rebuild(batch_size)}")
+        stamps.touch_all()
+    return {
+        "groups": len(group_ids),
+        "users": len(user_ids),
+        "posts": posts,
+        "follows": len(pairs),
+        "comments": comments if last_post >= first_post else 0,
+    }
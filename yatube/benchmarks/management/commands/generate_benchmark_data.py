@@ -0,0 +1,45 @@
+from benchmarks import generator
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Заполняет базу синтетическими данными для нагрузочных тестов"
+
+    def add_arguments(self, parser):
+        for name, default in (
+            ("users", 100),
+            ("posts", 1000),
+            ("follows", 1000),
+            ("comments", 1000),
+            ("groups", 10),
+            ("batch-size", 1000),
+        ):
+            parser.add_argument(f"--{name}", type=int, default=default)
+        parser.add_argument(
+            "--seed", type=int, help="Зерно генератора для повторяемости"
+        )
+        parser.add_argument(
+            "--no-index",
+            action="store_true",
+            help="Не пересобирать поисковый индекс",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Заполнять базу по умолчанию, даже если в ней есть посты",
+        )
+
+    def handle(self, *args, **options):
+        if not options["force"] and generator.is_working_database():
+            raise CommandError(generator.WORKING_DATABASE)
+        generator.generate(
+            users=options["users"],
+            posts=options["posts"],
+            follows=options["follows"],
+            comments=options["comments"],
+            groups=options["groups"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+            index=not options["no_index"],
+            log=self.stdout.write,
+        )
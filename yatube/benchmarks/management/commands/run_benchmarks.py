@@ -0,0 +1,64 @@
+import os
+
+from benchmarks import driver
+from django.core.management.base import BaseCommand, CommandError
+
+BASELINE = os.path.join(os.path.dirname(driver.__file__), "baseline.json")
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон страниц постов со сравнением с базовой "
+        "линией; при регрессии завершается с ошибкой"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--seed", type=int)
+        parser.add_argument(
+            "--routes",
+            nargs="+",
+            default=driver.ROUTES,
+            choices=driver.ROUTES,
+        )
+        parser.add_argument("--baseline", default=BASELINE)
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=1.25,
+            help="Во сколько раз может вырасти p95 без регрессии",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Сохранить результаты как новую базовую линию",
+        )
+
+    def handle(self, *args, **options):
+        path = options["baseline"]
+        if not options["save_baseline"] and not os.path.exists(path):
+            # Без базовой линии прогон ничего не проверяет
+            raise CommandError(
+                f"Базовой линии {path} нет: сохраните ее, запустив "
+                "команду с --save-baseline"
+            )
+        results = driver.run(
+            requests=options["requests"],
+            warmup=options["warmup"],
+            seed=options["seed"],
+            routes=options["routes"],
+            log=self.stdout.write,
+        )
+        if options["save_baseline"]:
+            driver.save_baseline(path, results)
+            self.stdout.write(f"Базовая линия сохранена в {path}")
+            return
+        regressions = driver.compare(
+            results, driver.load_baseline(path), options["tolerance"]
+        )
+        if regressions:
+            raise CommandError(
+                "Регрессии производительности:\n" + "\n".join(regressions)
+            )
+        self.stdout.write("Регрессий нет")
@@ -0,0 +1,52 @@
+from benchmarks import driver, generator
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Параллельная нагрузка чтением и записью: SQLite по умолчанию "
+        "против настроек из settings (WAL, PRAGMA, реплика для чтения)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--threads",
+            action="store_true",
+            help="Воркеры - потоки одного процесса, а не процессы",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--write-ratio",
+            type=float,
+            default=0.1,
+            help="Доля запросов на запись постов и комментариев",
+        )
+        parser.add_argument("--seed", type=int)
+        parser.add_argument(
+            "--modes",
+            nargs="+",
+            default=list(driver.MODES),
+            choices=list(driver.MODES),
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Писать в базу по умолчанию, даже если в ней есть посты",
+        )
+
+    def handle(self, *args, **options):
+        if not options["force"] and generator.is_working_database():
+            raise CommandError(generator.WORKING_DATABASE)
+        results = driver.compare_modes(
+            modes=options["modes"],
+            workers=options["workers"],
+            processes=not options["threads"],
+            requests=options["requests"],
+            write_ratio=options["write_ratio"],
+            seed=options["seed"],
+            log=self.stdout.write,
+        )
+        if {"plain", "tuned"} <= set(results):
+            gain = results["tuned"]["rps"] / results["plain"]["rps"]
+            self.stdout.write(f"Выигрыш пропускной способности: x{gain:.2f}")
@@ -0,0 +1,27 @@
+from benchmarks import rendering
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Время рендера каждого шаблона templates/posts/ без кеша "
+        "шаблонов и с ним"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--renders", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--modes",
+            nargs="+",
+            default=rendering.MODES,
+            choices=rendering.MODES,
+        )
+
+    def handle(self, *args, **options):
+        rendering.run(
+            renders=options["renders"],
+            warmup=options["warmup"],
+            modes=options["modes"],
+            log=self.stdout.write,
+        )
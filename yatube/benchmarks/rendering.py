@@ -0,0 +1,136 @@
+"""Время рендера шаблонов templates/posts/.
+
+Контекст каждой страницы собирается заранее так же, как во view, и
+страницы постов уже загружены из базы, поэтому замер включает только
+шаблонизатор: загрузку шаблонов, контекст-процессоры, включаемые
+фрагменты, виджеты форм и теги. Режим plain читает и разбирает шаблоны
+при каждом рендере, как Django при DEBUG, cached - профиль из settings
+с кешированным загрузчиком.
+"""
+import copy
+import os
+import time
+
+from benchmarks import driver
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from posts import counters, directory, feed, search, views
+from posts.forms import CommentForm, PostForm
+from posts.models import Post
+
+TEMPLATES = os.path.join(settings.TEMPLATES_DIR, "posts")
+MODES = ("plain", "cached")
+
+
+def templates_for(mode):
+    """settings.TEMPLATES с кешированным загрузчиком или без него."""
+    templates = copy.deepcopy(settings.TEMPLATES)
+    loaders = list(settings.TEMPLATE_LOADERS)
+    if mode == "cached":
+        loaders = [("django.template.loaders.cached.Loader", loaders)]
+    templates[0]["OPTIONS"]["loaders"] = loaders
+    return templates
+
+
+def template_names():
+    """Страницы из templates/posts/; includes рендерятся внутри них."""
+    return sorted(
+        f"posts/{name}"
+        for name in os.listdir(TEMPLATES)
+        if name.endswith(".html")
+    )
+
+
+def _page(queryset):
+    return views.paginator(RequestFactory().get("/"), queryset)
+
+
+def contexts(request):
+    """Контекст каждой страницы templates/posts/, как в ее view."""
+    post = (
+        Post.objects.select_related("author__stats", "group")
+        .filter(group__isnull=False)
+        .order_by("-pk")
+        .first()
+    )
+    if post is None:
+        raise RuntimeError("Нет постов в группах для рендера шаблонов")
+    stats = counters.author_stats(post.author)
+    found = Paginator(
+        search.search(post.text.split()[0], Post.objects.for_feed()),
+        views.NUMBERS_OF_LIMIT,
+    ).get_page(1)
+    found.object_list = list(found.object_list)
+    return {
+        "posts/create_post.html": {"form": PostForm()},
+        "posts/follow.html": {
+            "page_obj": _page(feed.feed_for(request.user).for_feed())
+        },
+        "posts/group_index.html": {"groups": directory.directory()},
+        "posts/group_list.html": {
+            "group": post.group,
+            "page_obj": _page(post.group.posts.for_feed()),
+        },
+        "posts/index.html": {"page_obj": _page(Post.objects.for_feed())},
+        "posts/post_detail.html": {
+            "post": post,
+            "count": stats.posts_count,
+            "comments": views.comments_page(request, post.pk),
+            "form": CommentForm(),
+        },
+        "posts/profile.html": {
+            "author": post.author,
+            "page_obj": _page(post.author.posts.for_feed()),
+            "count": stats.posts_count,
+            "stats": stats,
+            "following": False,
+        },
+        "posts/search.html": {"query": "", "page_obj": found},
+    }
+
+
+def _measure(name, context, request, renders, warmup):
+    durations = []
+    for number in range(warmup + renders):
+        start = time.perf_counter()
+        render_to_string(name, context, request=request)
+        if number >= warmup:
+            durations.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(driver.percentile(durations, 50), 3),
+        "p95_ms": round(driver.percentile(durations, 95), 3),
+    }
+
+
+def run(renders=50, warmup=5, modes=MODES, log=None):
+    """Рендерит каждую страницу в каждом режиме; возвращает
+    {шаблон: {режим: {p50_ms, p95_ms}}}.
+    """
+    log = log or (lambda message: None)
+    request = RequestFactory().get("/")
+    request.user = driver._reader()
+    if request.user is None:
+        raise RuntimeError("Нет пользователей для рендера шаблонов")
+    pages = contexts(request)
+    results = {name: {} for name in template_names()}
+    for mode in modes:
+        with override_settings(TEMPLATES=templates_for(mode)):
+            for name in results:
+                results[name][mode] = _measure(
+                    name, pages[name], request, renders, warmup
+                )
+    for name, result in results.items():
+        line = ", ".join(
+            f"{mode} p50 {timing['p50_ms']} мс"
+            for mode, timing in result.items()
+        )
+        if "plain" in result and "cached" in result:
+            gain = result["plain"]["p50_ms"] / max(
+                result["cached"]["p50_ms"], 0.001
+            )
+            line += f" (быстрее в {gain:.1f} раза)"
+        log(f"{name}: {line}")
+    return results
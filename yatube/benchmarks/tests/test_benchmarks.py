@@ -0,0 +1,144 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from benchmarks import driver, generator, rendering
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from posts.models import AuthorStats, FeedEntry, Follow, Post
+
+
+class BenchmarksTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.created = generator.generate(
+            users=10, posts=60, follows=20, comments=30, groups=3, seed=1
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.baseline = os.path.join(self.directory, "baseline.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_generator_keeps_derived_data(self):
+        """Генератор создает данные и пересобирает счетчики и ленты."""
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Follow.objects.count(), self.created["follows"])
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list("posts_count", flat=True)),
+            60,
+        )
+        follow = Follow.objects.first()
+        self.assertEqual(
+            FeedEntry.objects.filter(user=follow.user_id).count(),
+            Post.objects.filter(
+                author__following__user=follow.user_id
+            ).count(),
+        )
+
+    def test_working_database_refused(self):
+        """Команды с записью не трогают заполненную базу по умолчанию."""
+        commands = ("generate_benchmark_data", "run_concurrency_benchmark")
+        for command in commands:
+            with self.subTest(command=command):
+                with self.assertRaisesMessage(CommandError, "YATUBE_DATABASE"):
+                    call_command(command, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 60)
+        with override_settings(DATABASE_PATH=self.baseline):
+            self.assertFalse(generator.is_working_database())
+
+    def test_run_reports_every_route(self):
+        """Прогон дает перцентили и число запросов для всех маршрутов."""
+        results = driver.run(requests=3, warmup=1, seed=1)
+        self.assertEqual(set(results), set(driver.ROUTES))
+        for route, result in results.items():
+            with self.subTest(route=route):
+                self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+                self.assertGreater(result["queries"], 0)
+
+    def test_missing_baseline_fails_command(self):
+        """Без базовой линии сравнение не пропускается молча."""
+        with self.assertRaisesMessage(CommandError, "--save-baseline"):
+            call_command(
+                "run_benchmarks",
+                f"--baseline={self.baseline}",
+                stdout=StringIO(),
+            )
+
+    def test_regression_fails_command(self):
+        """Рост числа запросов относительно базовой линии - ошибка."""
+        call_command(
+            "run_benchmarks",
+            "--requests=2",
+            "--warmup=0",
+            f"--baseline={self.baseline}",
+            "--save-baseline",
+            stdout=StringIO(),
+        )
+        with open(self.baseline) as file:
+            baseline = json.load(file)
+        baseline["posts:index"]["queries"] -= 2
+        with open(self.baseline, "w") as file:
+            json.dump(baseline, file)
+        with self.assertRaisesMessage(CommandError, "posts:index"):
+            call_command(
+                "run_benchmarks",
+                "--requests=2",
+                "--warmup=0",
+                f"--baseline={self.baseline}",
+                stdout=StringIO(),
+            )
+
+
+class RenderBenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        generator.generate(
+            users=5, posts=20, follows=5, comments=5, groups=2, seed=1
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_template_measured(self):
+        """Каждый шаблон templates/posts/ рендерится в обоих режимах."""
+        out = StringIO()
+        call_command("run_render_benchmark", "--renders=2", stdout=out)
+        results = rendering.run(renders=2, warmup=0)
+        self.assertEqual(set(results), set(rendering.template_names()))
+        self.assertIn("posts/index.html", rendering.template_names())
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertEqual(set(result), set(rendering.MODES))
+        self.assertIn("posts/post_detail.html: plain p50", out.getvalue())
+
+
+class ConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        generator.generate(
+            users=5, posts=20, follows=5, comments=5, groups=2, seed=1
+        )
+
+    def test_compare_modes(self):
+        """Прогон с записью проходит в обоих режимах. Воркер один: в
+        тестовой базе в памяти потоки блокируют таблицы друг друга.
+        """
+        posts = Post.objects.count()
+        results = driver.compare_modes(
+            workers=1, requests=8, write_ratio=0.5, processes=False, seed=1
+        )
+        self.assertEqual(set(results), set(driver.MODES))
+        for mode, result in results.items():
+            with self.subTest(mode=mode):
+                self.assertEqual(result["errors"], 0)
+                self.assertGreater(result["rps"], 0)
+        self.assertGreater(Post.objects.count(), posts)
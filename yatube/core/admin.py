@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "name",
+        "status",
+        "attempts",
+        "run_at",
+        "finished",
+    )
+    list_filter = ("status", "name")
+    search_fields = ("key",)
+    readonly_fields = ("last_error",)
+
+
+admin.site.register(Task, TaskAdmin)
@@ -1,5 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.template.loader import get_template
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core import db  # noqa: F401
+
+        # С кешированным загрузчиком частые шаблоны разбираются один
+        # раз при запуске, а не в первом запросе
+        if getattr(settings, 'TEMPLATE_CACHE', False):
+            for name in getattr(settings, 'TEMPLATE_PRELOAD', ()):
+                get_template(name)
@@ -0,0 +1,32 @@
+"""Шаблонизатор Django, который измеряет время рендера для метрик."""
+import time
+
+from core import metrics
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        collected = metrics.current()
+        # Вложенный рендер (виджеты форм) уже учтен во внешнем
+        if collected is None or collected.rendering:
+            return super().render(context, request)
+        collected.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            collected.render_time += time.perf_counter() - start
+            collected.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
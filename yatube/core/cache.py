@@ -0,0 +1,326 @@
+"""Кеш в файле SQLite, общий для всех процессов на одном хосте.
+
+В отличие от LocMemCache каждый воркер WSGI видит одни и те же данные:
+закешированные карточки постов и хранилище ключей sorl-thumbnail не
+дублируются по процессам. Файл открывается в режиме WAL, чтение идет
+через mmap, при переполнении вытесняются давно не читавшиеся записи.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "core.cache.SQLiteCache",
+            "LOCATION": "/path/to/cache.sqlite3",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from core import metrics
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache_entries ("
+    " key TEXT PRIMARY KEY,"
+    " value BLOB NOT NULL,"
+    " expires REAL,"
+    " accessed REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS cache_entries_accessed"
+    " ON cache_entries (accessed)",
+    "CREATE TABLE IF NOT EXISTS cache_stats ("
+    " name TEXT PRIMARY KEY,"
+    " value INTEGER NOT NULL)",
+)
+STATS = ("hits", "misses", "evictions")
+
+
+class SQLiteCache(BaseCache):
+    # Время последнего чтения обновляется не чаще раза в ACCESS_RESOLUTION
+    # секунд, чтобы чтение почти никогда не превращалось в запись.
+    ACCESS_RESOLUTION = 30
+    # Размер кеша проверяется раз в CULL_CHECK_INTERVAL записей.
+    CULL_CHECK_INTERVAL = 100
+    # Статистика копится в памяти и сбрасывается в файл пачками.
+    STATS_FLUSH_INTERVAL = 100
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._path = location
+        self._mmap_size = int(options.get("MMAP_SIZE", 64 * 1024 * 1024))
+        self._busy_timeout = float(options.get("BUSY_TIMEOUT", 5))
+        self._local = threading.local()
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            # Соединение, унаследованное после fork, не используется.
+            local.connection = None
+            local.pid = os.getpid()
+            local.pending = dict.fromkeys(STATS, 0)
+            local.writes = 0
+        if local.connection is None:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path, timeout=self._busy_timeout
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA mmap_size={self._mmap_size}")
+            for statement in SCHEMA:
+                connection.execute(statement)
+            local.connection = connection
+        return local.connection
+
+    def _count(self, stat, value=1):
+        pending = self._local.pending
+        pending[stat] += value
+        if sum(pending.values()) >= self.STATS_FLUSH_INTERVAL:
+            self._flush_stats()
+
+    def _flush_stats(self):
+        connection = self._connection()
+        pending = self._local.pending
+        rows = [(name, value) for name, value in pending.items() if value]
+        if not rows:
+            return
+        with connection:
+            connection.executemany(
+                "INSERT INTO cache_stats (name, value) VALUES (?, ?)"
+                " ON CONFLICT(name)"
+                " DO UPDATE SET value = value + excluded.value",
+                rows,
+            )
+        self._local.pending = dict.fromkeys(STATS, 0)
+
+    def _lookup(self, keys):
+        """Читает живые значения ключей и обновляет время доступа."""
+        connection = self._connection()
+        now = time.time()
+        found = {}
+        stale = []
+        placeholders = ", ".join("?" * len(keys))
+        rows = connection.execute(
+            "SELECT key, value, expires, accessed FROM cache_entries"
+            f" WHERE key IN ({placeholders})",
+            keys,
+        )
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            found[key] = pickle.loads(value)
+            if now - accessed > self.ACCESS_RESOLUTION:
+                stale.append((now, key))
+        if stale:
+            with connection:
+                connection.executemany(
+                    "UPDATE cache_entries SET accessed = ? WHERE key = ?",
+                    stale,
+                )
+        self._count("hits", len(found))
+        self._count("misses", len(keys) - len(found))
+        metrics.count_cache(len(found), len(keys) - len(found))
+        return found
+
+    def _store(self, rows, mode="REPLACE"):
+        connection = self._connection()
+        with connection:
+            cursor = connection.executemany(
+                f"INSERT OR {mode} INTO cache_entries"
+                " (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        self._written(len(rows))
+        return cursor.rowcount
+
+    def _written(self, count):
+        self._local.writes += count
+        if self._local.writes >= self.CULL_CHECK_INTERVAL:
+            self._local.writes = 0
+            self._cull()
+
+    def _row(self, key, value, timeout):
+        return (
+            key,
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            self.get_backend_timeout(timeout),
+            time.time(),
+        )
+
+    def _cull(self):
+        """Удаляет истекшие записи, а при переполнении - давно не
+        читавшиеся (LRU).
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "DELETE FROM cache_entries WHERE expires <= ?", (time.time(),)
+            )
+            (count,) = connection.execute(
+                "SELECT COUNT(*) FROM cache_entries"
+            ).fetchone()
+            if count <= self._max_entries:
+                return
+            excess = count - self._max_entries
+            if self._cull_frequency:
+                excess = max(excess, count // self._cull_frequency)
+            evicted = connection.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                " SELECT key FROM cache_entries ORDER BY accessed LIMIT ?)",
+                (excess,),
+            ).rowcount
+        self._count("evictions", evicted)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            # Истекшая запись не мешает добавить новую.
+            connection.execute(
+                "DELETE FROM cache_entries WHERE key = ? AND expires <= ?",
+                (key, time.time()),
+            )
+        return self._store([self._row(key, value, timeout)], "IGNORE") == 1
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._lookup([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        made = {self.make_key(key, version=version): key for key in keys}
+        for key in made:
+            self.validate_key(key)
+        found = self._lookup(list(made))
+        return {made[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._store([self._row(key, value, timeout)])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        rows = []
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            rows.append(self._row(key, value, timeout))
+        if rows:
+            self._store(rows)
+        return []
+
+    def update_many(
+        self, keys, function, timeout=DEFAULT_TIMEOUT, version=None
+    ):
+        """Атомарно читает ключи keys и записывает изменения, которые
+        вернет function(найденные значения) -> (изменения, результат).
+        Возвращает результат. BEGIN IMMEDIATE берет блокировку записи
+        до чтения, поэтому другие процессы не изменят ключи в промежутке.
+        """
+        made = {self.make_key(key, version=version): key for key in keys}
+        for key in made:
+            self.validate_key(key)
+        placeholders = ", ".join("?" * len(made))
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            found = {
+                made[key]: pickle.loads(value)
+                for key, value in connection.execute(
+                    "SELECT key, value FROM cache_entries"
+                    f" WHERE key IN ({placeholders})"
+                    " AND (expires IS NULL OR expires > ?)",
+                    [*made, time.time()],
+                )
+            }
+            changes, result = function(found)
+            rows = []
+            for key, value in changes.items():
+                key = self.make_key(key, version=version)
+                self.validate_key(key)
+                rows.append(self._row(key, value, timeout))
+            connection.executemany(
+                "INSERT OR REPLACE INTO cache_entries"
+                " (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        self._written(len(rows))
+        return result
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            return (
+                connection.execute(
+                    "UPDATE cache_entries SET expires = ?"
+                    " WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                    (self.get_backend_timeout(timeout), key, time.time()),
+                ).rowcount
+                == 1
+            )
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        if not keys:
+            return
+        for key in keys:
+            self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "DELETE FROM cache_entries WHERE key = ?",
+                [(key,) for key in keys],
+            )
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = (
+            self._connection()
+            .execute(
+                "SELECT 1 FROM cache_entries"
+                " WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row is not None
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM cache_entries")
+
+    def stats(self):
+        """Попадания, промахи, вытеснения и число записей - общие для
+        всех процессов, работающих с файлом.
+        """
+        self._flush_stats()
+        connection = self._connection()
+        result = dict.fromkeys(STATS, 0)
+        result.update(
+            connection.execute("SELECT name, value FROM cache_stats")
+        )
+        (result["entries"],) = connection.execute(
+            "SELECT COUNT(*) FROM cache_entries"
+        ).fetchone()
+        return result
+
+    def reset_stats(self):
+        self._connection()
+        self._local.pending = dict.fromkeys(STATS, 0)
+        with self._local.connection as connection:
+            connection.execute("DELETE FROM cache_stats")
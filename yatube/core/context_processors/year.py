@@ -1,9 +1,21 @@
+import time
 from datetime import datetime
 
+# Текущий год и время, до которого он не изменится
+_year = (None, 0.0)
+
 
 def year(request):
-    """Добавляет переменную с текущим годом."""
-    now = datetime.now()
+    """Добавляет переменную с текущим годом.
+
+    Год вычисляется заново, только когда наступает следующий.
+    """
+    global _year
+    current, until = _year
+    if time.time() >= until:
+        current = datetime.now().year
+        until = datetime(current + 1, 1, 1).timestamp()
+        _year = (current, until)
     return {
-        'year': now.year,
+        'year': current,
     }
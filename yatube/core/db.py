@@ -0,0 +1,94 @@
+"""SQLite в боевом режиме.
+
+Каждое новое соединение с SQLite получает PRAGMA из SQLITE_PRAGMAS
+(WAL, synchronous=NORMAL, mmap, размер кеша страниц). В режиме WAL
+запись не блокирует читателей, поэтому view, помеченные @read_only,
+читают через отдельное соединение только для чтения
+(DATABASE_READ_ALIAS), а запись всегда идет в default.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_state = threading.local()
+
+
+def is_read_only_connection(connection):
+    """Соединение открыто с ?mode=ro и писать в базу не может."""
+    return "mode=ro" in str(connection.settings_dict["NAME"])
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к новому соединению с SQLite."""
+    if connection.vendor != "sqlite":
+        return
+    pragmas = dict(getattr(settings, "SQLITE_PRAGMAS", {}))
+    if is_read_only_connection(connection):
+        # Режим журнала хранится в файле базы, его включает пишущее
+        # соединение; из read-only соединения он не меняется
+        pragmas.pop("journal_mode", None)
+    for name, value in pragmas.items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def read_alias():
+    """Алиас базы для чтения в read-only view или None."""
+    alias = getattr(settings, "DATABASE_READ_ALIAS", None)
+    if alias not in connections.databases:
+        return None
+    # В тестах реплика - зеркало default (TEST MIRROR): отдельное
+    # соединение не увидело бы незакоммиченных данных теста
+    name = connections[alias].settings_dict["NAME"]
+    if name == connections["default"].settings_dict["NAME"]:
+        return None
+    return alias
+
+
+def set_reading(enabled):
+    """Включает или выключает чтение через базу для чтения в потоке."""
+    _state.read_only = enabled
+
+
+@contextmanager
+def reading():
+    """Запросы на чтение внутри блока идут на базу для чтения."""
+    previous = getattr(_state, "read_only", False)
+    set_reading(True)
+    try:
+        yield
+    finally:
+        set_reading(previous)
+
+
+def read_only(view):
+    """Помечает view как только читающую базу."""
+    view.read_only = True
+    return view
+
+
+class ReadReplicaRouter:
+    """Чтение в read-only view - через DATABASE_READ_ALIAS, запись и
+    миграции - только в default.
+    """
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, "read_only", False):
+            return read_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Объект мог быть прочитан с реплики, но сохраняется в default
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == getattr(settings, "DATABASE_READ_ALIAS", None):
+            return False
+        return None
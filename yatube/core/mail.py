@@ -0,0 +1,39 @@
+"""Отправка писем через фоновую очередь.
+
+QueuedEmailBackend не ждет почтовый сервер в запросе: письмо (например,
+из PasswordResetView) ставится в очередь, и воркер отправляет его
+бэкендом из TASKS_EMAIL_BACKEND с повторами при ошибках.
+"""
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from core import tasks
+
+FIELDS = ("subject", "body", "from_email", "to", "cc", "bcc", "reply_to")
+
+
+def serialize(message):
+    if message.attachments:
+        raise ValueError("Письма с вложениями через очередь не отправляются")
+    data = {field: getattr(message, field) for field in FIELDS}
+    data["headers"] = message.extra_headers
+    data["alternatives"] = getattr(message, "alternatives", [])
+    return data
+
+
+@tasks.task(max_attempts=5)
+def send_email(data):
+    message = EmailMultiAlternatives(
+        headers=data["headers"],
+        alternatives=[tuple(item) for item in data["alternatives"]],
+        **{field: data[field] for field in FIELDS},
+    )
+    get_connection(settings.TASKS_EMAIL_BACKEND).send_messages([message])
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            send_email.enqueue(serialize(message))
+        return len(email_messages)
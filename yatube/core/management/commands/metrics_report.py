@@ -0,0 +1,54 @@
+from core import metrics
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Выводит метрики запросов по view, собранные всеми воркерами"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prometheus",
+            action="store_true",
+            help="Вывести в текстовом формате Prometheus",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Сбросить накопленные метрики после вывода",
+        )
+
+    def handle(self, *args, **options):
+        if options["prometheus"]:
+            self.stdout.write(metrics.exposition(), ending="")
+        else:
+            self.report(metrics.collected())
+        if options["reset"]:
+            metrics.reset()
+
+    def report(self, views):
+        if not views:
+            self.stdout.write("Метрик пока нет")
+            return
+        header = (
+            f"{'view':<28} {'запросов':>8} {'p50 мс':>7} {'p95 мс':>7} "
+            f"{'p99 мс':>7} {'SQL ср':>7} {'SQL p95 мс':>10} "
+            f"{'рендер p95':>10} {'кеш %':>6} {'429':>5}"
+        )
+        self.stdout.write(header)
+        for view, stats in sorted(views.items()):
+            duration = stats["histograms"]["duration_ms"]
+            queries = stats["histograms"]["queries"]
+            hits = stats["counters"]["cache_hits"]
+            lookups = hits + stats["counters"]["cache_misses"]
+            ratio = f"{100 * hits / lookups:.0f}" if lookups else "-"
+            # У view могут быть только отклоненные запросы без замеров
+            average = queries.total / queries.count if queries.count else 0
+            self.stdout.write(
+                f"{view:<28} {duration.count:>8} "
+                f"{duration.quantile(0.5):>7} {duration.quantile(0.95):>7} "
+                f"{duration.quantile(0.99):>7} "
+                f"{average:>7.1f} "
+                f"{stats['histograms']['db_time_ms'].quantile(0.95):>10} "
+                f"{stats['histograms']['render_time_ms'].quantile(0.95):>10} "
+                f"{ratio:>6} {stats['counters']['throttled']:>5}"
+            )
@@ -0,0 +1,38 @@
+from core import tasks
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Воркер фоновой очереди: выполняет задачи с повторами"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument(
+            "--processes",
+            action="store_true",
+            help="Воркеры - процессы, а не потоки одного процесса",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить готовые задачи и завершиться",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=1.0,
+            help="Пауза в секундах, когда очередь пуста",
+        )
+
+    def handle(self, *args, **options):
+        purged = tasks.purge(getattr(settings, "TASKS_KEEP_DONE_DAYS", 7))
+        if purged:
+            self.stdout.write(f"Удалено выполненных задач: {purged}")
+        done, failed = tasks.work(
+            workers=options["workers"],
+            processes=options["processes"],
+            once=options["once"],
+            poll=options["poll"],
+        )
+        self.stdout.write(f"Выполнено задач: {done}, с ошибками: {failed}")
@@ -0,0 +1,254 @@
+"""Метрики производительности запросов по именам view.
+
+MetricsMiddleware для выбранной доли запросов (METRICS_SAMPLE_RATE)
+собирает время ответа, число и время запросов к базе, время рендера
+шаблонов и попадания в кеш. Значения копятся в гистограммах процесса,
+которые периодически сохраняются в общий кеш, поэтому /metrics и команда
+metrics_report видят данные всех воркеров.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+# Верхние границы корзин гистограмм
+TIME_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+HISTOGRAMS = {
+    "duration_ms": TIME_BUCKETS,
+    "db_time_ms": TIME_BUCKETS,
+    "render_time_ms": TIME_BUCKETS,
+    "queries": COUNT_BUCKETS,
+}
+# throttled считается для всех запросов, а не только для измеряемых
+COUNTERS = ("cache_hits", "cache_misses", "throttled")
+
+PROCESSES_KEY = "metrics:processes"
+SNAPSHOT_KEY = "metrics:snapshot:{}"
+
+_local = threading.local()
+_lock = threading.Lock()
+_views = {}
+_flushed = 0.0
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами, как в Prometheus."""
+
+    def __init__(self, buckets, counts=None, total=0.0):
+        self.buckets = tuple(buckets)
+        # Последняя корзина - значения больше верхней границы
+        self.counts = list(counts or [0] * (len(self.buckets) + 1))
+        self.total = total
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+
+    def quantile(self, q):
+        """Верхняя граница корзины, в которую попадает квантиль q."""
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                if index < len(self.buckets):
+                    return self.buckets[index]
+                return float("inf")
+        return 0
+
+    def to_dict(self):
+        return {"counts": self.counts, "total": self.total}
+
+
+class RequestMetrics:
+    """Метрики одного запроса, которые собирают обертки."""
+
+    __slots__ = (
+        "queries",
+        "db_time",
+        "render_time",
+        "rendering",
+        "hits",
+        "misses",
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.rendering = False
+        self.hits = 0
+        self.misses = 0
+
+
+def sample_rate():
+    return getattr(settings, "METRICS_SAMPLE_RATE", 0)
+
+
+def current():
+    """Метрики текущего запроса или None, если он не измеряется."""
+    return getattr(_local, "metrics", None)
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    metrics = _local.metrics
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+@contextmanager
+def collect():
+    """Собирает метрики запросов к базе, выполненных внутри блока."""
+    metrics = _local.metrics = RequestMetrics()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_query_wrapper))
+            yield metrics
+    finally:
+        _local.metrics = None
+
+
+def count_cache(hits, misses):
+    metrics = current()
+    if metrics is not None:
+        metrics.hits += hits
+        metrics.misses += misses
+
+
+def _new_stats():
+    return {
+        "histograms": {
+            name: Histogram(buckets) for name, buckets in HISTOGRAMS.items()
+        },
+        "counters": dict.fromkeys(COUNTERS, 0),
+    }
+
+
+def record(view, duration, metrics):
+    """Добавляет измеренный запрос в гистограммы view."""
+    values = {
+        "duration_ms": duration * 1000,
+        "db_time_ms": metrics.db_time * 1000,
+        "render_time_ms": metrics.render_time * 1000,
+        "queries": metrics.queries,
+    }
+    with _lock:
+        stats = _views.get(view)
+        if stats is None:
+            stats = _views[view] = _new_stats()
+        for name, value in values.items():
+            stats["histograms"][name].observe(value)
+        stats["counters"]["cache_hits"] += metrics.hits
+        stats["counters"]["cache_misses"] += metrics.misses
+    _flush_if_due()
+
+
+def count(view, name, value=1):
+    """Увеличивает счетчик view независимо от выборки запросов."""
+    with _lock:
+        stats = _views.get(view)
+        if stats is None:
+            stats = _views[view] = _new_stats()
+        stats["counters"][name] += value
+    _flush_if_due()
+
+
+def _flush_if_due():
+    interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 10)
+    if time.monotonic() - _flushed >= interval:
+        flush()
+
+
+def snapshot():
+    """Метрики процесса в виде, пригодном для сохранения в кеш."""
+    with _lock:
+        return {
+            view: {
+                "histograms": {
+                    name: histogram.to_dict()
+                    for name, histogram in stats["histograms"].items()
+                },
+                "counters": dict(stats["counters"]),
+            }
+            for view, stats in _views.items()
+        }
+
+
+def flush():
+    """Сохраняет метрики процесса в общий кеш."""
+    global _flushed
+    _flushed = time.monotonic()
+    timeout = getattr(settings, "METRICS_TTL", 24 * 60 * 60)
+    pid = os.getpid()
+    cache.set(SNAPSHOT_KEY.format(pid), snapshot(), timeout)
+    processes = cache.get(PROCESSES_KEY, [])
+    if pid not in processes:
+        cache.set(PROCESSES_KEY, processes + [pid], timeout)
+
+
+def collected():
+    """Метрики всех процессов, объединенные по view."""
+    flush()
+    result = {}
+    snapshots = cache.get_many(
+        [SNAPSHOT_KEY.format(pid) for pid in cache.get(PROCESSES_KEY, [])]
+    )
+    for data in snapshots.values():
+        for view, stats in data.items():
+            merged = result.setdefault(view, _new_stats())
+            for name, values in stats["histograms"].items():
+                merged["histograms"][name].merge(
+                    Histogram(HISTOGRAMS[name], **values)
+                )
+            for name, value in stats["counters"].items():
+                merged["counters"][name] += value
+    return result
+
+
+def reset():
+    """Сбрасывает метрики этого процесса и снимки в кеше."""
+    with _lock:
+        _views.clear()
+    pids = cache.get(PROCESSES_KEY, [])
+    cache.delete_many([SNAPSHOT_KEY.format(pid) for pid in pids])
+    cache.delete(PROCESSES_KEY)
+
+
+def exposition():
+    """Метрики в текстовом формате Prometheus."""
+    lines = []
+    for view, stats in sorted(collected().items()):
+        label = f'view="{view}"'
+        for name, histogram in stats["histograms"].items():
+            metric = f"yatube_request_{name}"
+            seen = 0
+            for bound, count in zip(
+                histogram.buckets + ("+Inf",), histogram.counts
+            ):
+                seen += count
+                lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {seen}')
+            lines.append(f"{metric}_sum{{{label}}} {histogram.total:.3f}")
+            lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+        for name, value in stats["counters"].items():
+            lines.append(f"yatube_{name}_total{{{label}}} {value}")
+    return "\n".join(lines) + "\n"
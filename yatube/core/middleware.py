@@ -0,0 +1,202 @@
+import mimetypes
+import os
+import random
+import time
+from stat import S_ISREG
+
+from core import db, metrics, ratelimit, snapshots, staticfiles
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+
+class MetricsMiddleware:
+    """Измеряет выбранную долю запросов и пишет метрики по view.
+
+    При METRICS_SAMPLE_RATE = 0 запросы не измеряются и middleware
+    только читает настройку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = metrics.sample_rate()
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+        start = time.perf_counter()
+        with metrics.collect() as collected:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        metrics.record(view, duration, collected)
+        return response
+
+
+class ReadOnlyMiddleware:
+    """GET и HEAD к view с @read_only читают базу через соединение для
+    чтения; потоковый ответ читает через него же, пока отдается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.read_only = False
+        try:
+            response = self.get_response(request)
+        finally:
+            db.set_reading(False)
+        if request.read_only and response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in ("GET", "HEAD") and getattr(
+            view_func, "read_only", False
+        ):
+            request.read_only = True
+            db.set_reading(True)
+
+    def stream(self, content):
+        with db.reading():
+            yield from content
+
+
+class RateLimitMiddleware:
+    """Отвечает 429 на запросы к view из RATE_LIMITS сверх лимита."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = request.resolver_match.view_name
+        wait = ratelimit.check(request, view)
+        if not wait:
+            return None
+        metrics.count(view, "throttled")
+        response = HttpResponse(
+            "Слишком много запросов, повторите позже",
+            status=429,
+            content_type="text/plain; charset=utf-8",
+        )
+        response["Retry-After"] = str(wait)
+        return response
+
+
+class SnapshotMiddleware:
+    """Отдает снимок страницы анонимному GET или HEAD без параметров."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.serve(request) or self.get_response(request)
+
+    def serve(self, request):
+        if (
+            not snapshots.enabled()
+            or request.method not in ("GET", "HEAD")
+            or request.META.get("QUERY_STRING")
+            # Адрес без слеша перенаправляет CommonMiddleware
+            or not request.path_info.endswith("/")
+            or not snapshots.is_anonymous(request)
+        ):
+            return None
+        try:
+            path = snapshots.file_path(request.path_info)
+            stat = os.stat(path)
+        except (SuspiciousFileOperation, OSError):
+            return None
+        if not was_modified_since(
+            request.META.get("HTTP_IF_MODIFIED_SINCE"),
+            stat.st_mtime,
+            stat.st_size,
+        ):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(open(path, "rb"))
+            # FileResponse заменяет text/html своей догадкой без charset
+            response["Content-Type"] = "text/html; charset=utf-8"
+            response["Last-Modified"] = http_date(stat.st_mtime)
+        # Снимок только для анонимов: общий кеш не отдаст его по чужой
+        # сессии, а браузер сверяет Last-Modified при каждом переходе
+        patch_vary_headers(response, ["Cookie"])
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class StaticFilesMiddleware:
+    """Отдает файлы STATIC_ROOT по STATIC_URL до сессий и view.
+
+    Если клиент принимает br или gzip, отдается сжатый при collectstatic
+    вариант. Имена с хешем кешируются навсегда, остальные - на
+    STATIC_MAX_AGE секунд.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.serve(request) or self.get_response(request)
+
+    def serve(self, request):
+        prefix = settings.STATIC_URL
+        path = request.path_info
+        if (
+            not settings.STATIC_ROOT
+            or request.method not in ("GET", "HEAD")
+            or not path.startswith(prefix)
+        ):
+            return None
+        name = path[len(prefix):]
+        try:
+            fullpath = safe_join(settings.STATIC_ROOT, name)
+            stat = os.stat(fullpath)
+        except (SuspiciousFileOperation, OSError):
+            return None
+        if not S_ISREG(stat.st_mode):
+            return None
+        if not was_modified_since(
+            request.META.get("HTTP_IF_MODIFIED_SINCE"),
+            stat.st_mtime,
+            stat.st_size,
+        ):
+            response = HttpResponseNotModified()
+        else:
+            response = self.file_response(request, fullpath)
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        if name in getattr(staticfiles_storage, "immutable_names", ()):
+            response["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            max_age = getattr(settings, "STATIC_MAX_AGE", 60)
+            response["Cache-Control"] = f"public, max-age={max_age}"
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+    def file_response(self, request, fullpath):
+        header = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        accepted = {token.split(";")[0].strip() for token in header.split(",")}
+        path, encoding = fullpath, None
+        for name, suffix in staticfiles.ENCODINGS:
+            if name in accepted and os.path.isfile(fullpath + suffix):
+                path, encoding = fullpath + suffix, name
+                break
+        response = FileResponse(open(path, "rb"))
+        # Тип - по исходному файлу, а не по сжатому варианту
+        content_type, _ = mimetypes.guess_type(fullpath)
+        response["Content-Type"] = content_type or "application/octet-stream"
+        if encoding:
+            response["Content-Encoding"] = encoding
+        return response
@@ -11,3 +11,55 @@ class CreatedModel(models.Model):
     class Meta:
         # Это абстрактная модель:
         abstract = True
+
+
+class Task(models.Model):
+    """Задача фоновой очереди (core.tasks)."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Не выполнена"),
+    )
+
+    name = models.CharField("Функция", max_length=200)
+    payload = models.TextField("Аргументы в JSON")
+    key = models.CharField(
+        "Ключ идемпотентности",
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(
+        "Статус", max_length=16, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        "Наибольшее число попыток", default=3
+    )
+    run_at = models.DateTimeField("Выполнить после")
+    locked_until = models.DateTimeField(
+        "Занята воркером до", null=True, blank=True
+    )
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    created = models.DateTimeField("Дата создания", auto_now_add=True)
+    finished = models.DateTimeField("Дата завершения", null=True, blank=True)
+
+    class Meta:
+        ordering = ["run_at"]
+        verbose_name = "Задача"
+        verbose_name_plural = "Задачи"
+        indexes = [
+            models.Index(
+                fields=["status", "run_at"], name="task_status_run_at_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
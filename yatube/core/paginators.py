@@ -0,0 +1,219 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def map_union(queryset, function):
+    """Применяет function к каждой части объединения queryset (union) и
+    собирает его заново с той же сортировкой; к обычному queryset -
+    function(queryset).
+    """
+    query = queryset.query
+    if not query.combinator:
+        return function(queryset)
+    parts = [
+        function(
+            queryset.__class__(
+                model=queryset.model, query=part.clone(), using=queryset.db
+            )
+        )
+        for part in query.combined_queries
+    ]
+    return (
+        parts[0]
+        .union(*parts[1:], all=query.combinator_all)
+        .order_by(*query.order_by)
+    )
+
+
+class CursorPaginator(Paginator):
+    """Постраничная навигация по курсору (keyset) без COUNT и OFFSET.
+
+    Страница выбирается условием по ключу сортировки (created, pk), поэтому
+    запрос идет по индексу CreatedModel.created и не зависит от глубины.
+    Курсор - непрозрачная строка для параметра ?cursor=. Явная сортировка
+    запроса (order_by по полям или аннотациям) сохраняется. В объединении
+    (union) условие курсора ставится в каждую часть: каждая читается по
+    своему индексу, а SQLite сливает их без сортировки.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        if ordering is None:
+            ordering = object_list.query.order_by or ("-created", "-pk")
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = tuple(ordering)
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._num_pages = 1
+
+    @property
+    def num_pages(self):
+        # Номер страницы курсору неизвестен: соседние страницы
+        # обозначаются номерами вокруг текущей, чтобы методы Page
+        # (has_next, has_previous) работали без COUNT(*).
+        return self._num_pages
+
+    def _field(self, name):
+        opts = self.object_list.model._meta
+        if name == "pk":
+            return opts.pk
+        query = self.object_list.query
+        if query.combinator:
+            query = query.combined_queries[0]
+        annotation = query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return opts.get_field(name)
+
+    def _fields(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def _position(self, obj):
+        return [getattr(obj, field) for field in self._fields()]
+
+    def encode_cursor(self, reverse, position):
+        data = json.dumps(
+            ["p" if reverse else "n"]
+            + [
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in position
+            ]
+        )
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            direction, *values = data
+            if direction not in ("n", "p") or len(values) != len(
+                self.ordering
+            ):
+                raise InvalidCursor
+            position = [
+                self._field(name).to_python(value)
+                for name, value in zip(self._fields(), values)
+            ]
+        except (
+            binascii.Error,
+            ValueError,
+            TypeError,
+            ValidationError,
+        ) as error:
+            raise InvalidCursor from error
+        return direction == "p", position
+
+    def _seek(self, position, reverse):
+        condition = Q()
+        fields = self._fields()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith("-") != reverse
+            lookup = "lt" if descending else "gt"
+            step = Q(**{f"{fields[index]}__{lookup}": position[index]})
+            for name, value in zip(fields[:index], position[:index]):
+                step &= Q(**{name: value})
+            condition |= step
+        # Лишняя граница по первому полю: без нее SQLite разбивает OR
+        # на поиски по индексу и потом сортирует результат
+        descending = self.ordering[0].startswith("-") != reverse
+        lookup = "lte" if descending else "gte"
+        return Q(**{f"{fields[0]}__{lookup}": position[0]}) & condition
+
+    def _ordering(self, reverse):
+        if not reverse:
+            return self.ordering
+        return [
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        ]
+
+    def page_queryset(self, cursor):
+        """Запрос страницы на per_page + 1 строк (лишняя - признак
+        продолжения) и направление выборки.
+        """
+        reverse, position = False, None
+        if cursor:
+            try:
+                reverse, position = self.decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+        queryset = self.object_list
+        if position is not None:
+            queryset = self._after(queryset, position, reverse)
+        queryset = queryset.order_by(*self._ordering(reverse))
+        return queryset[: self.per_page + 1], reverse, position is not None
+
+    def _after(self, queryset, position, reverse):
+        condition = self._seek(position, reverse)
+        return map_union(queryset, lambda part: part.filter(condition))
+
+    def iter_page(self, cursor):
+        """Отдает объекты страницы по мере чтения из базы (.iterator()).
+
+        Курсоры соседних страниц заполняются после обхода всей страницы.
+        """
+        queryset, reverse, has_cursor = self.page_queryset(cursor)
+        if reverse and self.object_list.query.combinator:
+            # Объединение не бывает подзапросом: страница читается целиком
+            rows = reversed(list(queryset[: self.per_page]))
+        elif reverse:
+            # Ближайшие к курсору строки выбираются подзапросом, чтобы
+            # отдавать их сразу в прямом порядке.
+            rows = self.object_list.filter(
+                pk__in=queryset[: self.per_page].values("pk")
+            ).iterator()
+        else:
+            rows = queryset.iterator()
+        first = last = None
+        has_more = False
+        for index, obj in enumerate(rows):
+            if index == self.per_page:
+                has_more = True
+                break
+            if first is None:
+                first = self._position(obj)
+            last = self._position(obj)
+            yield obj
+        if reverse:
+            has_next = True
+            has_previous = (
+                first is not None
+                and self._after(self.object_list, first, True).exists()
+            )
+        else:
+            has_next, has_previous = has_more, has_cursor
+        if last is not None and has_next:
+            self.next_cursor = self.encode_cursor(False, last)
+        if first is not None and has_previous:
+            self.previous_cursor = self.encode_cursor(True, first)
+
+    def get_page(self, cursor):
+        """Возвращает страницу по курсору; неверный курсор - первая."""
+        queryset, reverse, has_cursor = self.page_queryset(cursor)
+        items = list(queryset)
+        has_more = len(items) > self.per_page
+        items = items[: self.per_page]
+        if reverse:
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, has_cursor
+        if items and has_next:
+            self.next_cursor = self.encode_cursor(
+                False, self._position(items[-1])
+            )
+        if items and has_previous:
+            self.previous_cursor = self.encode_cursor(
+                True, self._position(items[0])
+            )
+        number = 2 if self.previous_cursor else 1
+        self._num_pages = number + 1 if self.next_cursor else number
+        return Page(items, number, self)
@@ -0,0 +1,107 @@
+"""Ограничение частоты запросов на запись.
+
+Для view из RATE_LIMITS каждый пользователь и каждый IP получают свою
+корзину токенов в общем кеше: корзина вмещает N запросов и пополняется
+на N за период, поэтому короткий всплеск проходит, а поток записи
+ограничен средней частотой. Запрос без токена получает 429 с
+Retry-After, а число отклоненных запросов копится в метриках view.
+
+    RATE_LIMITS = {
+        "posts:add_comment": {
+            "methods": ["POST"],
+            "user": "20/m",
+            "ip": "60/m",
+        },
+    }
+
+Корзины всех областей запроса проверяются и списываются одной
+атомарной операцией кеша (SQLiteCache.update_many): токен берется,
+только если его дают все области, а одновременные запросы не проходят
+сверх лимита. С другими бэкендами кеша атомарность обеспечивает
+блокировка внутри процесса.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+KEY = "ratelimit:{view}:{scope}:{ident}"
+
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): запросов за период в секундах."""
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+def _update(keys, function, timeout):
+    update_many = getattr(cache, "update_many", None)
+    if update_many is not None:
+        return update_many(keys, function, timeout)
+    with _lock:
+        changes, result = function(cache.get_many(keys))
+        cache.set_many(changes, timeout)
+        return result
+
+
+def consume_many(buckets, now=None):
+    """Берет по токену из каждой корзины {ключ: частота}, только если
+    токен есть во всех. Возвращает 0 или число секунд до момента, когда
+    токены появятся во всех корзинах.
+    """
+    now = time.time() if now is None else now
+    rates = {key: parse_rate(rate) for key, rate in buckets.items()}
+
+    def take(found):
+        states = {}
+        wait = 0
+        for key, (capacity, period) in rates.items():
+            refill = capacity / period
+            tokens, updated = found.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            if tokens < 1:
+                # round: 0.99999 токена из-за дробей не добавляет
+                # лишнюю секунду
+                wait = max(wait, math.ceil(round((1 - tokens) / refill, 6)))
+            states[key] = (tokens - 1, now)
+        return ({} if wait else states), wait
+
+    # Полная корзина не отличается от отсутствующей: записи живут
+    # самый длинный период
+    timeout = max(period for _, period in rates.values())
+    return _update(list(rates), take, timeout)
+
+
+def consume(key, rate, now=None):
+    """Берет токен из корзины key. Возвращает 0, если токен был, иначе
+    число секунд до появления следующего.
+    """
+    return consume_many({key: rate}, now)
+
+
+def identities(request):
+    """Области ограничения запроса и их идентификаторы."""
+    # За обратным прокси REMOTE_ADDR должен выставлять сам прокси
+    yield "ip", request.META.get("REMOTE_ADDR", "")
+    if request.user.is_authenticated:
+        yield "user", request.user.pk
+
+
+def check(request, view):
+    """Секунды до следующего разрешенного запроса к view или 0."""
+    rule = getattr(settings, "RATE_LIMITS", {}).get(view)
+    if not rule:
+        return 0
+    if "methods" in rule and request.method not in rule["methods"]:
+        return 0
+    buckets = {
+        KEY.format(view=view, scope=scope, ident=ident): rule[scope]
+        for scope, ident in identities(request)
+        if scope in rule
+    }
+    return consume_many(buckets) if buckets else 0
@@ -0,0 +1,119 @@
+"""Готовые HTML-снимки страниц для анонимных посетителей.
+
+Ответ view на анонимный GET без параметров сохраняется в SNAPSHOT_ROOT:
+адрес /group/slug/ - в файл group/slug/index.html. Снимки отдает
+SnapshotMiddleware (core.middleware) до сессий и view или сам
+веб-сервер: запрос без строки параметров и без cookie сессии и
+сообщений, для которого есть файл SNAPSHOT_ROOT$uri/index.html, можно
+отдать этим файлом.
+
+Какие адреса снимать и когда их перерисовывать, решает приложение:
+schedule() ставит перерисовку в фоновую очередь (core.tasks). Адрес,
+который больше не отвечает 200, теряет снимок. Пустой SNAPSHOT_ROOT
+выключает снимки.
+"""
+import os
+import tempfile
+from urllib.parse import unquote
+
+from core import tasks
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpRequest
+from django.urls import Resolver404, resolve
+from django.utils._os import safe_join
+
+FILENAME = "index.html"
+# С этими cookie страница зависит от посетителя: вход, сообщения
+BYPASS_COOKIES = ("messages",)
+
+
+def root():
+    return getattr(settings, "SNAPSHOT_ROOT", None)
+
+
+def enabled():
+    return bool(root())
+
+
+def url_path(url):
+    """Путь снимка для адреса из reverse(): без %-кодирования, как
+    request.path_info и $uri веб-сервера.
+    """
+    return unquote(url)
+
+
+def file_path(path):
+    """Файл снимка адреса path; вне SNAPSHOT_ROOT -
+    SuspiciousFileOperation.
+    """
+    return safe_join(root(), path.lstrip("/"), FILENAME)
+
+
+def exists(path):
+    return os.path.exists(file_path(path))
+
+
+def render(path):
+    """Ответ view на анонимный GET path или None, если адреса нет."""
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = path
+    request.user = AnonymousUser()
+    try:
+        request.resolver_match = match = resolve(path)
+        return match.func(request, *match.args, **match.kwargs)
+    except (Resolver404, Http404):
+        return None
+
+
+def write(path, content):
+    target = file_path(path)
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    # Временный файл и переименование: сервер не отдаст недописанный
+    # снимок
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            file.write(content)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, target)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def remove(path):
+    try:
+        os.remove(file_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def refresh(path):
+    """Перерисовывает снимок path; возвращает, записан ли он."""
+    response = render(path)
+    if response is None or response.status_code != 200:
+        remove(path)
+        return False
+    write(path, response.content)
+    return True
+
+
+@tasks.task()
+def regenerate(paths):
+    for path in paths:
+        refresh(path)
+
+
+def schedule(paths):
+    """Ставит перерисовку адресов paths в очередь после коммита."""
+    paths = sorted(set(paths))
+    if enabled() and paths:
+        regenerate.enqueue(paths)
+
+
+def is_anonymous(request):
+    cookies = (settings.SESSION_COOKIE_NAME,) + BYPASS_COOKIES
+    return not any(name in request.COOKIES for name in cookies)
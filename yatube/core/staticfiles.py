@@ -0,0 +1,87 @@
+"""Статика с хешами в именах и заранее сжатыми вариантами.
+
+collectstatic копирует файлы в STATIC_ROOT под именами с хешем
+содержимого (ManifestStaticFilesStorage) и кладет рядом с текстовыми
+файлами варианты .gz и, если установлен пакет brotli, .br. Их отдает
+StaticFilesMiddleware (core.middleware) без сжатия на лету: имя с
+хешем меняется вместе с содержимым, поэтому такие файлы кешируются
+браузером навсегда.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.functional import cached_property
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    ".css",
+    ".js",
+    ".map",
+    ".svg",
+    ".html",
+    ".txt",
+    ".json",
+    ".xml",
+    ".ico",
+    ".ttf",
+    ".eot",
+)
+# Вариант пишется, только если он меньше исходного хотя бы на 5%
+COMPRESSION_RATIO = 0.95
+# Content-Encoding и суффикс файла в порядке предпочтения
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _compressors():
+    if brotli is not None:
+        yield ".br", lambda content: brotli.compress(content, quality=11)
+    # mtime=0: повторный collectstatic дает тот же файл
+    yield ".gz", lambda content: gzip.compress(
+        content, compresslevel=9, mtime=0
+    )
+
+
+def compress(path):
+    """Пишет сжатые варианты файла path; возвращает их пути."""
+    with open(path, "rb") as file:
+        content = file.read()
+    written = []
+    for suffix, compressor in _compressors():
+        compressed = compressor(content)
+        if len(compressed) < len(content) * COMPRESSION_RATIO:
+            with open(path + suffix, "wb") as file:
+                file.write(compressed)
+            written.append(path + suffix)
+        elif os.path.exists(path + suffix):
+            # Прежний вариант относится к старому содержимому
+            os.remove(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        self.__dict__.pop("immutable_names", None)
+        for name in sorted(set(paths) | set(self.hashed_files.values())):
+            if name.endswith(COMPRESSIBLE):
+                compress(self.path(name))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # collectstatic не запускался (разработка, тесты): файл
+            # отдается по исходному имени
+            return name
+
+    @cached_property
+    def immutable_names(self):
+        """Имена с хешем: их содержимое никогда не меняется."""
+        return frozenset(self.hashed_files.values())
@@ -0,0 +1,194 @@
+"""Фоновая очередь задач в базе.
+
+Функция, помеченная @task, ставится в очередь через .enqueue(): строка
+Task пишется в той же транзакции, что и изменения, ради которых нужна
+задача, и воркер (команда run_tasks) видит ее только после коммита.
+Упавшая задача повторяется с экспоненциальной задержкой, пока не
+исчерпает max_attempts попыток. Задача с ключом идемпотентности
+ставится в очередь один раз. С TASKS_ALWAYS_EAGER задача выполняется
+сразу после коммита в процессе, который ее поставил.
+"""
+import json
+import logging
+import multiprocessing
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from itertools import repeat
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import Task
+
+logger = logging.getLogger(__name__)
+
+# Сколько готовых задач воркер пробует забрать за один запрос
+CLAIM_BATCH = 10
+
+
+def task(max_attempts=3):
+    """Делает функцию фоновой задачей: func.enqueue(*args, key=None,
+    **kwargs). Аргументы должны сериализоваться в JSON.
+    """
+
+    def decorator(func):
+        func.task_name = f"{func.__module__}.{func.__qualname__}"
+        func.max_attempts = max_attempts
+        func.enqueue = lambda *args, key=None, **kwargs: enqueue(
+            func, args, kwargs, key=key
+        )
+        return func
+
+    return decorator
+
+
+def enqueue(func, args=(), kwargs=None, key=None, delay=0):
+    """Ставит задачу в очередь. Возвращает Task или None, если задача
+    с ключом key уже была поставлена.
+    """
+    task = Task(
+        name=func.task_name,
+        payload=json.dumps({"args": list(args), "kwargs": kwargs or {}}),
+        key=key,
+        max_attempts=func.max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    try:
+        # Точка сохранения: конфликт ключа не ломает внешнюю транзакцию
+        with transaction.atomic():
+            task.save()
+    except IntegrityError:
+        if key is None:
+            raise
+        return None
+    if getattr(settings, "TASKS_ALWAYS_EAGER", False):
+        transaction.on_commit(lambda: run(task.pk))
+    return task
+
+
+def _ready(now):
+    # Задача воркера, который упал, не успев ее закончить, снова готова
+    # после истечения аренды
+    return Q(status=Task.QUEUED, run_at__lte=now) | Q(
+        status=Task.RUNNING, locked_until__lt=now
+    )
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, "TASKS_LEASE", 300))
+
+
+def claim(pk=None):
+    """Забирает готовую задачу (или задачу pk) для этого воркера."""
+    now = timezone.now()
+    ready = Task.objects.filter(_ready(now))
+    candidates = [pk] if pk else ready.values_list("pk", flat=True)
+    for candidate in candidates[:CLAIM_BATCH]:
+        # Условный UPDATE: задачу получает только один из воркеров
+        claimed = ready.filter(pk=candidate).update(
+            status=Task.RUNNING,
+            locked_until=now + _lease(),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=candidate)
+    return None
+
+
+def backoff(attempts):
+    """Задержка перед повтором после attempts неудачных попыток."""
+    return timedelta(
+        seconds=getattr(settings, "TASKS_RETRY_BACKOFF", 10)
+        * 2 ** (attempts - 1)
+    )
+
+
+def execute(task):
+    """Выполняет забранную задачу; возвращает успешность."""
+    try:
+        data = json.loads(task.payload)
+        import_string(task.name)(*data["args"], **data["kwargs"])
+    except Exception:
+        logger.exception("Задача %s #%s упала", task.name, task.pk)
+        now = timezone.now()
+        retry = task.attempts < task.max_attempts
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.QUEUED if retry else Task.FAILED,
+            run_at=now + backoff(task.attempts) if retry else task.run_at,
+            finished=None if retry else now,
+            locked_until=None,
+            last_error=traceback.format_exc(),
+        )
+        return False
+    Task.objects.filter(pk=task.pk).update(
+        status=Task.DONE, finished=timezone.now(), locked_until=None
+    )
+    return True
+
+
+def run(pk):
+    """Выполняет задачу pk, если ее еще не забрал воркер."""
+    task = claim(pk)
+    return task is not None and execute(task)
+
+
+def _work(once, poll):
+    done = failed = 0
+    try:
+        while True:
+            task = claim()
+            if task is None:
+                if once:
+                    break
+                time.sleep(poll)
+                continue
+            if execute(task):
+                done += 1
+            else:
+                failed += 1
+    finally:
+        # Соединения открыты самим воркером - закрываем их здесь
+        connections.close_all()
+    return done, failed
+
+
+def _executor(workers, processes):
+    if processes and "fork" in multiprocessing.get_all_start_methods():
+        # Открытые соединения закрываются до fork, чтобы их
+        # не унаследовали дочерние процессы
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        )
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tasks")
+
+
+def work(workers=1, processes=False, once=False, poll=1.0):
+    """Выполняет задачи в workers потоках или процессах. С once -
+    пока в очереди есть готовые задачи. Возвращает число выполненных
+    и упавших задач.
+    """
+    if workers <= 1:
+        return _work(once, poll)
+    with _executor(workers, processes) as executor:
+        outcomes = list(
+            executor.map(_work, repeat(once, workers), repeat(poll, workers))
+        )
+    return (
+        sum(outcome[0] for outcome in outcomes),
+        sum(outcome[1] for outcome in outcomes),
+    )
+
+
+def purge(days):
+    """Удаляет выполненные задачи старше days дней; ключи
+    идемпотентности этих задач освобождаются.
+    """
+    return Task.objects.filter(
+        status=Task.DONE, finished__lt=timezone.now() - timedelta(days=days)
+    ).delete()[0]
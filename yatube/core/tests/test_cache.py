@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from core.cache import SQLiteCache
+from django.test import SimpleTestCase
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, "cache.sqlite3")
+        self.cache = SQLiteCache(
+            self.location, {"OPTIONS": {"MAX_ENTRIES": 10}}
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_set_get_delete(self):
+        """Базовые операции кеша."""
+        self.cache.set("key", {"value": 1})
+        self.assertEqual(self.cache.get("key"), {"value": 1})
+        self.assertFalse(self.cache.add("key", "other"))
+        self.assertTrue(self.cache.add("new", "other"))
+        self.cache.set_many({"a": 1, "b": 2})
+        self.assertEqual(
+            self.cache.get_many(["a", "b", "missing"]), {"a": 1, "b": 2}
+        )
+        self.cache.delete_many(["a", "key"])
+        self.assertIsNone(self.cache.get("key"))
+        self.assertFalse(self.cache.has_key("a"))
+        self.assertTrue(self.cache.has_key("b"))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("b"))
+
+    def test_expired_entries_are_missing(self):
+        """Истекшие записи не возвращаются."""
+        self.cache.set("key", "value", timeout=1)
+        self.cache.set("forever", "value", timeout=None)
+        self.cache.set("touched", "value", timeout=1)
+        self.assertTrue(self.cache.touch("touched", timeout=60))
+        time.sleep(1.1)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertTrue(self.cache.add("key", "again"))
+        self.assertEqual(self.cache.get("forever"), "value")
+        self.assertEqual(self.cache.get("touched"), "value")
+
+    def test_shared_between_instances(self):
+        """Записи видны другому экземпляру с тем же файлом."""
+        self.cache.set("key", "value")
+        other = SQLiteCache(self.location, {})
+        self.assertEqual(other.get("key"), "value")
+
+    def test_update_many_is_atomic(self):
+        """Одновременные обновления из разных соединений не теряются."""
+
+        def increment(found):
+            value = found.get("counter", 0) + 1
+            return {"counter": value}, value
+
+        def worker():
+            other = SQLiteCache(self.location, {})
+            for _ in range(25):
+                other.update_many(["counter"], increment)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get("counter"), 100)
+        self.assertEqual(self.cache.update_many(["counter"], increment), 101)
+
+    def test_lru_eviction_and_stats(self):
+        """Переполнение вытесняет давно не читавшиеся записи."""
+        self.cache.CULL_CHECK_INTERVAL = 1
+        self.cache.ACCESS_RESOLUTION = 0
+        self.cache.set("hot", "value")
+        for index in range(12):
+            time.sleep(0.001)
+            self.cache.get("hot")
+            self.cache.set(f"key{index}", index)
+        self.assertEqual(self.cache.get("hot"), "value")
+        self.assertIsNone(self.cache.get("key0"))
+        stats = self.cache.stats()
+        self.assertLessEqual(stats["entries"], 10)
+        self.assertGreater(stats["evictions"], 0)
+        self.assertEqual(stats["hits"], 13)
+        self.assertEqual(stats["misses"], 1)
@@ -0,0 +1,58 @@
+from unittest import mock
+
+from core import db
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SQLitePragmasTest(TestCase):
+    def test_pragmas_applied(self):
+        """Соединение открывается с PRAGMA из SQLITE_PRAGMAS."""
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -64000)
+
+    def test_read_only_connection_detected(self):
+        """Соединение с ?mode=ro считается только читающим."""
+        self.assertFalse(db.is_read_only_connection(connection))
+        replica = mock.Mock(settings_dict={"NAME": "file:db?mode=ro"})
+        self.assertTrue(db.is_read_only_connection(replica))
+
+
+class ReadReplicaRouterTest(TestCase):
+    @mock.patch("core.db.read_alias", return_value="replica")
+    def test_router(self, read_alias):
+        """Чтение - на реплику только внутри reading(), запись и
+        миграции - только в default.
+        """
+        router = db.ReadReplicaRouter()
+        self.assertIsNone(router.db_for_read(Post))
+        with db.reading():
+            self.assertEqual(router.db_for_read(Post), "replica")
+            self.assertEqual(router.db_for_write(Post), "default")
+        self.assertIsNone(router.db_for_read(Post))
+        self.assertFalse(router.allow_migrate("replica", "posts"))
+        self.assertIsNone(router.allow_migrate("default", "posts"))
+
+    def test_mirror_reads_default(self):
+        """В тестах реплика - зеркало default, чтение идет в default."""
+        self.assertIsNone(db.read_alias())
+
+    @mock.patch("core.db.read_alias", return_value=None)
+    def test_only_read_only_views_use_replica(self, read_alias):
+        """Реплику выбирают только GET-запросы к view с @read_only."""
+        self.client.force_login(User.objects.create_user(username="Test"))
+        self.client.get(reverse("posts:post_create"))
+        self.assertFalse(read_alias.called)
+        self.client.get(reverse("posts:index"))
+        self.assertTrue(read_alias.called)
+        read_alias.reset_mock()
+        self.client.get(reverse("posts:post_create"))
+        self.assertFalse(read_alias.called)
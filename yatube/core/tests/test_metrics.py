@@ -0,0 +1,55 @@
+from io import StringIO
+
+from core import metrics
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(METRICS_SAMPLE_RATE=1)
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username="TestAuthor")
+        Post.objects.create(text="Текст", author=author)
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = Client()
+
+    def test_request_metrics_recorded(self):
+        """Запрос к view записывает время, SQL, рендер и кеш."""
+        self.client.get(reverse("posts:index"))
+        stats = metrics.collected()["posts:index"]
+        histograms = stats["histograms"]
+        self.assertEqual(histograms["duration_ms"].count, 1)
+        self.assertGreater(histograms["queries"].total, 0)
+        self.assertGreater(histograms["db_time_ms"].total, 0)
+        self.assertGreater(histograms["render_time_ms"].total, 0)
+        self.assertGreater(stats["counters"]["cache_misses"], 0)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        """При нулевой доле запросы не измеряются."""
+        self.client.get(reverse("posts:index"))
+        self.assertEqual(metrics.collected(), {})
+
+    def test_export(self):
+        """Метрики доступны через /metrics и команду metrics_report."""
+        self.client.get(reverse("posts:index"))
+        response = self.client.get(reverse("metrics"))
+        self.assertContains(
+            response, 'yatube_request_duration_ms_count{view="posts:index"} 1'
+        )
+        out = StringIO()
+        call_command("metrics_report", stdout=out)
+        self.assertIn("posts:index", out.getvalue())
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 403)
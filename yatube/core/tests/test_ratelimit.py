@@ -0,0 +1,113 @@
+from io import StringIO
+
+from core import metrics, ratelimit
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class TokenBucketTest(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        """Частота задается как «запросов/период»."""
+        self.assertEqual(ratelimit.parse_rate("10/m"), (10, 60))
+        self.assertEqual(ratelimit.parse_rate("100/hour"), (100, 3600))
+
+    def test_bucket_refills(self):
+        """Корзина пропускает всплеск и пополняется со временем."""
+        key = "ratelimit:test"
+        self.assertEqual(ratelimit.consume(key, "2/m", now=0), 0)
+        self.assertEqual(ratelimit.consume(key, "2/m", now=0), 0)
+        self.assertEqual(ratelimit.consume(key, "2/m", now=0), 30)
+        self.assertEqual(ratelimit.consume(key, "2/m", now=20), 10)
+        self.assertEqual(ratelimit.consume(key, "2/m", now=30), 0)
+
+    def test_tokens_spent_only_when_all_allow(self):
+        """Отказ одной корзины не тратит токены других."""
+        buckets = {"ratelimit:user": "1/m", "ratelimit:ip": "2/m"}
+        self.assertEqual(ratelimit.consume_many(buckets, now=0), 0)
+        self.assertEqual(ratelimit.consume_many(buckets, now=0), 60)
+        self.assertEqual(ratelimit.consume("ratelimit:ip", "2/m", now=0), 0)
+
+
+@override_settings(
+    RATE_LIMITS={
+        "posts:add_comment": {"methods": ["POST"], "user": "2/m", "ip": "3/m"}
+    }
+)
+class RateLimitMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.reader = User.objects.create_user(username="TestReader")
+        cls.post = Post.objects.create(text="Текст", author=cls.author)
+        cls.url = reverse("posts:add_comment", kwargs={"post_id": cls.post.pk})
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+    def tearDown(self):
+        cache.clear()
+        metrics.reset()
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def comment(self, client):
+        return client.post(self.url, {"text": "Комментарий"})
+
+    def test_user_limit(self):
+        """Сверх лимита пользователя - 429 с Retry-After."""
+        client = self.client_for(self.author)
+        for _ in range(2):
+            self.assertEqual(self.comment(client).status_code, 302)
+        response = self.comment(client)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(Comment.objects.count(), 2)
+        # Чтение не ограничивается
+        detail = reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        self.assertEqual(client.get(detail).status_code, 200)
+
+    def test_ip_limit_shared_by_users(self):
+        """Лимит адреса общий для всех его пользователей."""
+        author = self.client_for(self.author)
+        reader = self.client_for(self.reader)
+        self.comment(author)
+        self.comment(author)
+        self.assertEqual(self.comment(reader).status_code, 302)
+        self.assertEqual(self.comment(reader).status_code, 429)
+
+    def test_rejected_request_keeps_ip_tokens(self):
+        """Запрос, отклоненный по пользователю, не тратит токен адреса."""
+        author = self.client_for(self.author)
+        for _ in range(3):
+            self.comment(author)
+        reader = self.client_for(self.reader)
+        self.assertEqual(self.comment(reader).status_code, 302)
+
+    def test_throttled_counted(self):
+        """Отклоненные запросы попадают в метрики view."""
+        client = self.client_for(self.author)
+        for _ in range(3):
+            self.comment(client)
+        stats = metrics.collected()["posts:add_comment"]
+        self.assertEqual(stats["counters"]["throttled"], 1)
+        out = StringIO()
+        call_command("metrics_report", stdout=out)
+        self.assertIn("posts:add_comment", out.getvalue())
+        self.assertIn(
+            'yatube_throttled_total{view="posts:add_comment"} 1',
+            metrics.exposition(),
+        )
@@ -0,0 +1,92 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_STATIC_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+STYLES = "body { background: url('../img/logo.png'); }\n" * 20
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_DIRS=[TEMP_STATIC_DIR],
+    STATICFILES_STORAGE=(
+        "core.staticfiles.CompressedManifestStaticFilesStorage"
+    ),
+)
+class StaticPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name, content in (
+            ("css/app.css", STYLES.encode()),
+            ("img/logo.png", b"\x89PNG\r\n\x1a\n" + bytes(range(256))),
+        ):
+            path = os.path.join(TEMP_STATIC_DIR, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(content)
+        # Статика приложений не нужна и только замедляет сборку
+        call_command(
+            "collectstatic",
+            "--noinput",
+            "--ignore=admin",
+            "--ignore=rest_framework",
+            "--ignore=debug_toolbar",
+            verbosity=0,
+        )
+        cls.css = staticfiles_storage.stored_name("css/app.css")
+        cls.css_path = os.path.join(TEMP_STATIC_ROOT, cls.css)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_STATIC_DIR, ignore_errors=True)
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """Имена с хешем, ссылки переписаны, текст сжат заранее."""
+        self.assertRegex(self.css, r"^css/app\.[0-9a-f]{12}\.css$")
+        logo = staticfiles_storage.stored_name("img/logo.png")
+        with gzip.open(self.css_path + ".gz") as file:
+            self.assertIn(logo.split("/")[1], file.read().decode())
+        self.assertFalse(
+            os.path.exists(os.path.join(TEMP_STATIC_ROOT, logo + ".gz"))
+        )
+        self.assertEqual(
+            staticfiles_storage.stored_name("css/missing.css"),
+            "css/missing.css",
+        )
+
+    def test_middleware_serves_compressed(self):
+        """Сжатый вариант по Accept-Encoding с вечным кешем."""
+        response = self.client.get(
+            settings.STATIC_URL + self.css, HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        with open(self.css_path + ".gz", "rb") as file:
+            self.assertEqual(b"".join(response.streaming_content), file.read())
+
+    def test_middleware_plain_and_cached(self):
+        """Без сжатия - исходный файл; имя без хеша кешируется ненадолго;
+        неизмененный файл - 304.
+        """
+        url = settings.STATIC_URL + "css/app.css"
+        response = self.client.get(url)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(b"".join(response.streaming_content).decode(), STYLES)
+        self.assertEqual(response["Cache-Control"], "public, max-age=60")
+        cached = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(cached.status_code, 304)
+        missing = self.client.get(settings.STATIC_URL + "css/missing.css")
+        self.assertEqual(missing.status_code, 404)
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from io import StringIO
+
+from core import tasks
+from core.models import Task
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+User = get_user_model()
+CALLS = []
+
+
+@tasks.task(max_attempts=2)
+def remember(value):
+    CALLS.append(value)
+
+
+@tasks.task(max_attempts=2)
+def fail():
+    raise RuntimeError("Сбой задачи")
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_worker_runs_enqueued_task(self):
+        """Воркер выполняет задачу из очереди с ее аргументами."""
+        task = remember.enqueue("значение")
+        self.assertEqual(CALLS, [])
+        out = StringIO()
+        call_command("run_tasks", workers=1, once=True, stdout=out)
+        self.assertIn("Выполнено задач: 1, с ошибками: 0", out.getvalue())
+        self.assertEqual(CALLS, ["значение"])
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(task.attempts, 1)
+
+    def test_idempotency_key(self):
+        """Задача с тем же ключом ставится в очередь один раз."""
+        self.assertIsNotNone(remember.enqueue(1, key="remember:1"))
+        self.assertIsNone(remember.enqueue(1, key="remember:1"))
+        tasks.work(once=True)
+        self.assertEqual(CALLS, [1])
+
+    def test_retry_with_backoff(self):
+        """Упавшая задача повторяется позже, а после последней попытки
+        помечается как невыполненная.
+        """
+        task = fail.enqueue()
+        self.assertEqual(tasks.work(once=True), (0, 1))
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertIn("Сбой задачи", task.last_error)
+        # Задержка еще не истекла
+        self.assertIsNone(tasks.claim())
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        self.assertEqual(tasks.work(once=True), (0, 1))
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    def test_backoff_grows(self):
+        """Задержка перед повтором растет экспоненциально."""
+        self.assertEqual(tasks.backoff(2), 2 * tasks.backoff(1))
+
+    def test_expired_lease_is_reclaimed(self):
+        """Задачу упавшего воркера забирают после истечения аренды."""
+        task = remember.enqueue("снова")
+        self.assertIsNotNone(tasks.claim())
+        self.assertIsNone(tasks.claim())
+        Task.objects.filter(pk=task.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(tasks.work(once=True), (1, 0))
+        self.assertEqual(CALLS, ["снова"])
+
+    def test_purge_keeps_recent_tasks(self):
+        """Удаляются только давно выполненные задачи."""
+        old = remember.enqueue("старая")
+        remember.enqueue("новая")
+        tasks.work(once=True)
+        Task.objects.filter(pk=old.pk).update(
+            finished=timezone.now() - timedelta(days=8)
+        )
+        self.assertEqual(tasks.purge(7), 1)
+        self.assertEqual(Task.objects.count(), 1)
+
+
+@override_settings(
+    EMAIL_BACKEND="core.mail.QueuedEmailBackend",
+    TASKS_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class QueuedEmailTest(TestCase):
+    def test_password_reset_mail_is_queued(self):
+        """Письмо сброса пароля отправляет воркер, а не запрос."""
+        User.objects.create_user(
+            username="Test", email="test@example.com", password="Pa55word!"
+        )
+        response = self.client.post(
+            reverse("users:password_reset_form"),
+            {"email": "test@example.com"},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(tasks.work(once=True), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["test@example.com"])
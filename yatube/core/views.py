@@ -1,3 +1,6 @@
+from core import metrics
+from django.conf import settings
+from django.http import HttpResponse
 from django.shortcuts import render
 
 
@@ -11,3 +14,14 @@ def csrf_failure(request, reason=""):
 
 def server_error(request):
     return render(request, "core/500.html", status=500)
+
+
+def metrics_view(request):
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", settings.INTERNAL_IPS)
+    if not (
+        request.META.get("REMOTE_ADDR") in allowed or request.user.is_staff
+    ):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        metrics.exposition(), content_type="text/plain; version=0.0.4"
+    )
@@ -5,6 +5,9 @@ import sys
 
 
 def main():
+    # manage.py test работает с настройками тестов, как и pytest
+    if sys.argv[1:2] == ['test']:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings_test')
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
     try:
         from django.core.management import execute_from_command_line
@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import SEARCH_VAR
 
+from . import search
 from .models import Follow, Group, Post
 
 
@@ -16,6 +18,19 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("created",)
     empty_value_display = "-пусто-"
 
+    def get_ordering(self, request):
+        # Найденные посты - по релевантности: ChangeList сортирует
+        # результат поиска по get_ordering()
+        if request.GET.get(SEARCH_VAR):
+            return ("-rank", "-created", "-pk")
+        return super().get_ordering(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по обратному индексу вместо LIKE по всей таблице
+        if not search_term:
+            return queryset, False
+        return search.search(search_term, queryset), False
+
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = (
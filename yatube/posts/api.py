@@ -0,0 +1,79 @@
+"""Чтение лент через API: потоковый JSON и условные ответы.
+
+Посты страницы сериализуются по одному по мере чтения из базы, поэтому
+ответ не собирается целиком в памяти. Условные ответы строятся по тем
+же меткам областей (stamps), что и у страниц: клиент, опрашивающий
+ленту, получает 304 без запросов страницы к базе.
+"""
+from core.paginators import CursorPaginator
+from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+
+from .serializers import PostSerializer
+
+PAGE_SIZE = 10
+
+
+def stream_posts(request, post_list):
+    """Потоковый ответ со страницей постов по курсору из ?cursor=."""
+    paginator = CursorPaginator(
+        PostSerializer.setup_eager_loading(post_list), PAGE_SIZE
+    )
+    return StreamingHttpResponse(
+        render_page(request, paginator, request.GET.get("cursor")),
+        content_type="application/json",
+    )
+
+
+def render_page(request, paginator, cursor):
+    encoder = JSONEncoder(ensure_ascii=False)
+    context = {"request": request}
+    yield '{"results": ['
+    for index, post in enumerate(paginator.iter_page(cursor)):
+        data = PostSerializer(post, context=context).data
+        yield ("," if index else "") + encoder.encode(data)
+    links = {
+        name: replace_query_param(
+            request.build_absolute_uri(), "cursor", value
+        )
+        if value
+        else None
+        for name, value in (
+            ("next", paginator.next_cursor),
+            ("previous", paginator.previous_cursor),
+        )
+    }
+    # Ссылки на соседние страницы известны только после обхода страницы
+    yield "], " + encoder.encode(links)[1:]
+
+
+def numbered_posts(request, post_list):
+    """Ответ со страницей постов по номеру из ?page= - для выдачи,
+    упорядоченной не по дате (поиск).
+    """
+    page_obj = Paginator(
+        PostSerializer.setup_eager_loading(post_list), PAGE_SIZE
+    ).get_page(request.GET.get("page"))
+    url = request.build_absolute_uri()
+    links = {"next": None, "previous": None}
+    if page_obj.has_next():
+        links["next"] = replace_query_param(
+            url, "page", page_obj.next_page_number()
+        )
+    if page_obj.has_previous():
+        links["previous"] = replace_query_param(
+            url, "page", page_obj.previous_page_number()
+        )
+    serializer = PostSerializer(
+        page_obj, many=True, context={"request": request}
+    )
+    return Response(
+        {
+            "count": page_obj.paginator.count,
+            **links,
+            "results": serializer.data,
+        }
+    )
@@ -0,0 +1,174 @@
+"""Денормализованные счетчики постов, комментариев, подписок и групп.
+
+Счетчики меняются атомарными UPDATE ... SET n = n + 1 из сигналов на
+создание и удаление Post, Comment и Follow. Массовые операции сигналов
+не вызывают, после них счетчики пересчитывает recount().
+"""
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from posts import directory
+from posts.models import AuthorStats, Follow, GroupStats, Post, User
+
+AUTHOR_COUNTERS = ("posts_count", "followers_count", "following_count")
+GROUP_COUNTERS = ("posts_count", "authors_count", "last_post")
+
+
+def author_stats(user):
+    """Счетчики пользователя; нулевые, если их еще нет в базе."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(user=user)
+
+
+def _shift(field, delta):
+    return Greatest(F(field) + delta, 0)
+
+
+def change_author(user_id, **deltas):
+    """Сдвигает счетчики автора: change_author(1, posts_count=1)."""
+    values = {field: _shift(field, delta) for field, delta in deltas.items()}
+    with transaction.atomic():
+        if AuthorStats.objects.filter(user_id=user_id).update(**values):
+            return
+        # Без строки уменьшать нечего; к тому же при удалении
+        # пользователя она уже удалена каскадом, и новая нарушила бы
+        # внешний ключ
+        if all(delta < 0 for delta in deltas.values()):
+            return
+        AuthorStats.objects.get_or_create(user_id=user_id)
+        AuthorStats.objects.filter(user_id=user_id).update(**values)
+
+
+def change_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=_shift("comments_count", delta)
+    )
+
+
+def _change_group(group_id, values):
+    with transaction.atomic():
+        if not GroupStats.objects.filter(group_id=group_id).update(**values):
+            GroupStats.objects.get_or_create(group_id=group_id)
+            GroupStats.objects.filter(group_id=group_id).update(**values)
+
+
+def add_group_post(post, group_id):
+    """Пост появился в группе: создан в ней или перенесен в нее."""
+    if group_id is None:
+        return
+    created = Value(post.created, output_field=DateTimeField())
+    values = {
+        "posts_count": _shift("posts_count", 1),
+        "last_post": Greatest(Coalesce("last_post", created), created),
+    }
+    others = Post.objects.filter(group_id=group_id, author_id=post.author_id)
+    if not others.exclude(pk=post.pk).exists():
+        values["authors_count"] = _shift("authors_count", 1)
+    _change_group(group_id, values)
+
+
+def remove_group_post(post, group_id):
+    """Пост ушел из группы: удален или перенесен в другую."""
+    if group_id is None:
+        return
+    remaining = Post.objects.filter(group_id=group_id).exclude(pk=post.pk)
+    # Число авторов считается заново, а не уменьшается: при удалении
+    # queryset или каскадом остальные посты пачки уже удалены, и сигнал
+    # каждого поста решил бы, что автор ушел из группы. Индекс
+    # (group, created) ограничивает подсчет постами группы.
+    actual = remaining.order_by().aggregate(
+        last=Max("created"), authors=Count("author", distinct=True)
+    )
+    values = {
+        "posts_count": _shift("posts_count", -1),
+        "last_post": actual["last"],
+        "authors_count": actual["authors"],
+    }
+    _change_group(group_id, values)
+
+
+def _counts(queryset, field):
+    return dict(queryset.values_list(field).annotate(n=Count("pk")))
+
+
+def recount(dry_run=False):
+    """Пересчитывает все счетчики и исправляет расхождения.
+
+    Возвращает число исправленных строк счетчиков авторов, постов
+    и групп.
+    """
+    actual = {
+        "posts_count": _counts(Post.objects.order_by(), "author"),
+        "followers_count": _counts(Follow.objects.order_by(), "author"),
+        "following_count": _counts(Follow.objects.order_by(), "user"),
+    }
+    stored = AuthorStats.objects.in_bulk()
+    changed, missing = [], []
+    for user_id in User.objects.values_list("pk", flat=True).iterator():
+        stats = stored.get(user_id) or AuthorStats(user_id=user_id)
+        drift = False
+        for field in AUTHOR_COUNTERS:
+            value = actual[field].get(user_id, 0)
+            if getattr(stats, field) != value:
+                setattr(stats, field, value)
+                drift = True
+        if drift:
+            (changed if user_id in stored else missing).append(stats)
+
+    posts = list(
+        Post.objects.order_by()
+        .annotate(actual=Count("comments"))
+        .exclude(comments_count=F("actual"))
+        .only("pk", "comments_count")
+    )
+    for post in posts:
+        post.comments_count = post.actual
+
+    groups = _group_stats()
+    stored = GroupStats.objects.in_bulk()
+    group_drift = sum(
+        _group_values(stored.get(pk)) != _group_values(groups.get(pk))
+        for pk in stored.keys() | groups.keys()
+    )
+
+    if not dry_run:
+        with transaction.atomic():
+            AuthorStats.objects.bulk_create(missing, batch_size=500)
+            AuthorStats.objects.bulk_update(
+                changed, AUTHOR_COUNTERS, batch_size=500
+            )
+            Post.objects.bulk_update(posts, ["comments_count"], batch_size=500)
+            if group_drift:
+                GroupStats.objects.all().delete()
+                GroupStats.objects.bulk_create(groups.values(), batch_size=500)
+        directory.invalidate()
+    return len(changed) + len(missing), len(posts), group_drift
+
+
+def _group_stats():
+    """Фактическая статистика групп, в которых есть посты."""
+    rows = (
+        Post.objects.filter(group__isnull=False)
+        .order_by()
+        .values("group")
+        .annotate(
+            posts_count=Count("pk"),
+            authors_count=Count("author", distinct=True),
+            last_post=Max("created"),
+        )
+    )
+    return {
+        row["group"]: GroupStats(
+            group_id=row["group"],
+            **{field: row[field] for field in GROUP_COUNTERS},
+        )
+        for row in rows
+    }
+
+
+def _group_values(stats):
+    stats = stats or GroupStats()
+    return tuple(getattr(stats, field) for field in GROUP_COUNTERS)
@@ -0,0 +1,39 @@
+"""Каталог групп со статистикой.
+
+Число постов, авторов и время последнего поста берутся из GroupStats,
+которую поддерживают сигналы, а готовый список групп хранится в кеше
+до следующего изменения. Страница каталога не агрегирует посты и
+обходится одним чтением из кеша.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from posts.models import Group
+
+DIRECTORY_KEY = "posts:groups:directory"
+
+
+def directory():
+    """Группы по названию со статистикой."""
+    groups = cache.get(DIRECTORY_KEY)
+    if groups is None:
+        groups = list(
+            Group.objects.order_by("title").values(
+                "title",
+                "slug",
+                "description",
+                posts_count=F("stats__posts_count"),
+                authors_count=F("stats__authors_count"),
+                last_post=F("stats__last_post"),
+            )
+        )
+        cache.set(DIRECTORY_KEY, groups, None)
+    return groups
+
+
+def invalidate():
+    """Сбрасывает каталог после коммита: до него другой запрос мог бы
+    снова закешировать прежнюю статистику.
+    """
+    transaction.on_commit(lambda: cache.delete(DIRECTORY_KEY))
@@ -0,0 +1,177 @@
+"""Лента подписок с раздачей постов при записи (fan-out-on-write).
+
+Новый пост раскладывается во «входящие» (FeedEntry) всех подписчиков
+автора, поэтому страница /follow/ читается по индексу (user, created)
+без соединения Post → Follow. Посты авторов, у которых подписчиков больше
+FEED_FANOUT_LIMIT, не раскладываются: их лента добирает при чтении.
+"""
+from core import tasks
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from posts.models import AuthorStats, FeedEntry, Follow, Post
+
+
+def fanout_limit():
+    return getattr(settings, "FEED_FANOUT_LIMIT", 1000)
+
+
+def batch_size():
+    return getattr(settings, "FEED_BATCH_SIZE", 500)
+
+
+def is_celebrity(author_id):
+    """Автор со слишком большим числом подписчиков для раздачи."""
+    return AuthorStats.objects.filter(
+        user_id=author_id, followers_count__gt=fanout_limit()
+    ).exists()
+
+
+def celebrity_followees(user):
+    """Авторы, на которых подписан пользователь и чьи посты лента
+    добирает при чтении: «знаменитости» и авторы, раздача которых еще
+    в очереди.
+    """
+    return (
+        Follow.objects.filter(user=user)
+        .filter(
+            Q(author__stats__followers_count__gt=fanout_limit())
+            | Q(author__stats__feed_pending=True)
+        )
+        .values_list("author", flat=True)
+    )
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(author_id=post.author_id).values_list(
+        "user_id", flat=True
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, post=post, created=post.created)
+            for user_id in follower_ids.iterator()
+        ),
+        batch_size=batch_size(),
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика все посты автора."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        "pk", "created"
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, post_id=post_id, created=created)
+            for post_id, created in posts.iterator()
+        ),
+        batch_size=batch_size(),
+        ignore_conflicts=True,
+    )
+
+
+def rebuild():
+    """Пересобирает ленты всех подписчиков после массовой загрузки
+    данных в обход сигналов; возвращает число записей.
+
+    Счетчики подписчиков (AuthorStats) должны быть уже пересчитаны.
+    """
+    FeedEntry.objects.all().delete()
+    AuthorStats.objects.filter(feed_pending=True).update(feed_pending=False)
+    # Одним INSERT ... SELECT: по записи на каждую пару
+    # (подписчик, пост автора), кроме авторов-«знаменитостей»
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FeedEntry._meta.db_table}"
+            " (user_id, post_id, created)"
+            " SELECT follow.user_id, post.id, post.created"
+            f" FROM {Follow._meta.db_table} follow"
+            f" JOIN {Post._meta.db_table} post"
+            " ON post.author_id = follow.author_id"
+            f" LEFT JOIN {AuthorStats._meta.db_table} stats"
+            " ON stats.user_id = follow.author_id"
+            " WHERE COALESCE(stats.followers_count, 0) <= %s",
+            [fanout_limit()],
+        )
+        return cursor.rowcount
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты подписчика посты автора."""
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+@tasks.task()
+def backfill_followers(author_id):
+    """Раскладывает посты автора по лентам всех его подписчиков."""
+    with transaction.atomic():
+        for follower_id in (
+            Follow.objects.filter(author_id=author_id)
+            .values_list("user_id", flat=True)
+            .iterator()
+        ):
+            backfill(follower_id, author_id)
+        # Вместе с записями лент: до коммита посты добираются при чтении
+        AuthorStats.objects.filter(user_id=author_id).update(
+            feed_pending=False
+        )
+
+
+def on_unfollow(user_id, author_id):
+    trim(user_id, author_id)
+    # Автор перестал быть «знаменитостью»: его посты, которые добирались
+    # при чтении, раскладываются по лентам оставшихся подписчиков в
+    # очереди, а не в запросе отписки. Пока задача не выполнена, ленты
+    # добирают их при чтении (feed_pending).
+    if AuthorStats.objects.filter(
+        user_id=author_id, followers_count=fanout_limit()
+    ).update(feed_pending=True):
+        backfill_followers.enqueue(author_id)
+
+
+def feed_for(user):
+    """Посты авторов, на которых подписан пользователь."""
+    celebrities = list(celebrity_followees(user))
+    if not celebrities:
+        # Сортировка по копии created и посту из FeedEntry: страница
+        # читается по индексу (user, created, post) без сортировки
+        return (
+            Post.objects.filter(feed_entries__user=user)
+            .annotate(
+                feed_created=F("feed_entries__created"),
+                feed_post=F("feed_entries__post"),
+            )
+            .order_by("-feed_created", "-feed_post")
+        )
+    # Объединение входящих и постов каждой «знаменитости»: каждая часть
+    # читается по своему индексу, SQLite сливает их без сортировки.
+    # Посты, разложенные, пока автор не стал «знаменитостью», берутся
+    # только из его части
+    inbox = (
+        Post.objects.filter(feed_entries__user=user)
+        .exclude(author__in=celebrities)
+        .annotate(
+            feed_created=F("feed_entries__created"),
+            feed_post=F("feed_entries__post"),
+        )
+    )
+    parts = [
+        Post.objects.filter(author=author).annotate(
+            feed_created=F("created"), feed_post=F("pk")
+        )
+        for author in celebrities
+    ]
+    return (
+        inbox.order_by()
+        .union(*(part.order_by() for part in parts), all=True)
+        .order_by("-feed_created", "-feed_post")
+    )
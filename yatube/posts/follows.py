@@ -0,0 +1,65 @@
+"""Граф подписок: на кого подписан пользователь.
+
+Множество авторов пользователя читается одним запросом и хранится в
+общем кеше, пока сигналы Follow его не сбросят, поэтому «подписан ли»
+на страницах проверяется без запросов к базе. Подписка и отписка - по
+одному запросу: повторную подписку и подписку на себя отклоняют
+ограничения unique_follow и no_follow_myself, отписка узнает о
+результате по числу удаленных строк. Загрузки в обход сигналов видны
+после FOLLOWS_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from posts.models import Follow
+
+FOLLOWEES_KEY = "posts:followees:{}"
+
+
+def _timeout():
+    return getattr(settings, "FOLLOWS_CACHE_TIMEOUT", 60 * 60)
+
+
+def followees(user_id):
+    """Множество id авторов, на которых подписан пользователь."""
+    key = FOLLOWEES_KEY.format(user_id)
+    authors = cache.get(key)
+    if authors is None:
+        authors = frozenset(
+            Follow.objects.filter(user_id=user_id).values_list(
+                "author_id", flat=True
+            )
+        )
+        cache.set(key, authors, _timeout())
+    return authors
+
+
+def is_following(user, author_id):
+    return user.is_authenticated and author_id in followees(user.pk)
+
+
+def invalidate(user_id):
+    key = FOLLOWEES_KEY.format(user_id)
+    cache.delete(key)
+    if transaction.get_connection().in_atomic_block:
+        # До коммита другой запрос мог снова закешировать прежние
+        # подписки - сбрасываем еще раз после него
+        transaction.on_commit(lambda: cache.delete(key))
+
+
+def follow(user, author):
+    """Подписывает user на author; возвращает, появилась ли подписка."""
+    try:
+        # Точка сохранения: конфликт не ломает внешнюю транзакцию
+        with transaction.atomic():
+            Follow.objects.create(user=user, author=author)
+    except IntegrityError:
+        return False
+    return True
+
+
+def unfollow(user, author):
+    """Отписывает user от author; возвращает, была ли подписка."""
+    deleted, _ = Follow.objects.filter(user=user, author=author).delete()
+    return bool(deleted)
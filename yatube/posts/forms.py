@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from . import images
 from .models import Comment, Post
 
 
@@ -18,6 +20,14 @@ class PostForm(forms.ModelForm):
             "image": "Изображение, прикрепляемое к посту",
         }
 
+    def clean_image(self):
+        image = self.cleaned_data["image"]
+        # Прежняя картинка при редактировании уже обработана
+        if not isinstance(image, UploadedFile):
+            return image
+        images.check_limits(image)
+        return images.optimize(image)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
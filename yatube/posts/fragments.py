@@ -0,0 +1,26 @@
+"""Кеш отрендеренных карточек постов в лентах.
+
+Каждая карточка кешируется тегом {% cache %} отдельно для каждого
+варианта ленты и сбрасывается сигналами при изменении поста, его
+группы или автора, поэтому новые посты видны сразу.
+"""
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+CARD_FRAGMENT = "post_card"
+CARD_VARIANTS = ("index", "group", "profile", "follow")
+
+
+def card_keys(post_ids):
+    return [
+        make_template_fragment_key(CARD_FRAGMENT, [post_id, variant])
+        for post_id in post_ids
+        for variant in CARD_VARIANTS
+    ]
+
+
+def invalidate_post_cards(post_ids):
+    """Сбрасывает закешированные карточки постов во всех лентах."""
+    keys = card_keys(post_ids)
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,101 @@
+"""Обработка картинок, загружаемых к постам.
+
+Загрузка больше FILE_UPLOAD_MAX_MEMORY_SIZE пишется во временный файл,
+а не в память. Файл больше POST_IMAGE_MAX_SIZE обрывает запрос еще при
+приеме (SizeLimitUploadHandler), а картинка больше POST_IMAGE_MAX_PIXELS
+отклоняется формой до декодирования. Остальные картинки
+поворачиваются по EXIF и пересохраняются без метаданных, не шире
+POST_IMAGE_MAX_WIDTH: непрозрачные - в POST_IMAGE_FORMAT, прозрачные -
+в PNG. GIF сохраняется как есть, чтобы не потерять анимацию.
+"""
+import os
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """Обрывает прием файла, как только он превысил POST_IMAGE_MAX_SIZE,
+    а запрос с заведомо большим Content-Length - до чтения тела. Ответ -
+    400, как при превышении DATA_UPLOAD_MAX_MEMORY_SIZE.
+    """
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        # Кроме файла в теле только поля формы, а их размер ограничен
+        # DATA_UPLOAD_MAX_MEMORY_SIZE
+        fields = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        limit = settings.POST_IMAGE_MAX_SIZE + (fields or 0)
+        if fields is not None and content_length > limit:
+            raise RequestDataTooBig("Загрузка больше POST_IMAGE_MAX_SIZE")
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_SIZE:
+            raise RequestDataTooBig("Файл больше POST_IMAGE_MAX_SIZE")
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def check_limits(upload):
+    """Отклоняет слишком большой файл или картинку."""
+    if upload.size > settings.POST_IMAGE_MAX_SIZE:
+        raise forms.ValidationError(
+            "Файл больше %(limit)s",
+            params={"limit": filesizeformat(settings.POST_IMAGE_MAX_SIZE)},
+        )
+    # Размеры известны из заголовка, картинка еще не декодирована
+    width, height = upload.image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise forms.ValidationError("Слишком большое разрешение картинки")
+
+
+def has_alpha(image):
+    return image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+
+
+def optimize(upload):
+    """Пересохраняет загруженную картинку; возвращает файл для поля."""
+    upload.seek(0)
+    image = Image.open(upload)
+    if image.format == "GIF":
+        upload.seek(0)
+        return upload
+    image = ImageOps.exif_transpose(image)
+    max_width = settings.POST_IMAGE_MAX_WIDTH
+    if image.width > max_width:
+        image = image.resize(
+            (max_width, round(image.height * max_width / image.width)),
+            Image.LANCZOS,
+        )
+    if has_alpha(image):
+        image_format = "PNG"
+        image = image.convert("RGBA")
+    else:
+        image_format = settings.POST_IMAGE_FORMAT
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        image_format,
+        optimize=True,
+        progressive=True,
+        quality=settings.POST_IMAGE_QUALITY,
+    )
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return ContentFile(buffer.getvalue(), name=name + EXTENSIONS[image_format])
@@ -0,0 +1,36 @@
+import shutil
+
+from core import snapshots as store
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import snapshots
+
+
+class Command(BaseCommand):
+    help = "Рендерит снимки страниц для анонимных посетителей"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts",
+            type=int,
+            default=None,
+            help="Сколько последних постов снимать; по умолчанию все",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Сначала удалить все снимки, в том числе устаревшие",
+        )
+
+    def handle(self, *args, **options):
+        if not store.enabled():
+            raise CommandError("SNAPSHOT_ROOT не задан")
+        if options["clear"]:
+            shutil.rmtree(store.root(), ignore_errors=True)
+        written = skipped = 0
+        for path in snapshots.all_paths(posts=options["posts"]):
+            if store.refresh(path):
+                written += 1
+            else:
+                skipped += 1
+        self.stdout.write(f"Записано снимков: {written}, пропущено: {skipped}")
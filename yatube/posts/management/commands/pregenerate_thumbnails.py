@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Нарезает миниатюры для уже загруженных картинок постов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Число потоков нарезки; 1 - без пула",
+        )
+
+    def handle(self, *args, **options):
+        images = (
+            Post.objects.exclude(image="")
+            .order_by()
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        if options["workers"] <= 1:
+            results = [thumbnails.pregenerate(name) for name in images]
+        else:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                results = list(
+                    pool.map(
+                        thumbnails.pregenerate_in_worker, images.iterator()
+                    )
+                )
+        self.stdout.write(
+            f"Обработано картинок: {len(results)}, "
+            f"с ошибками: {results.count(False)}"
+        )
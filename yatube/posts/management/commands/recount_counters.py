@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счетчики постов, комментариев и подписок"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать расхождения, ничего не сохранять",
+        )
+
+    def handle(self, *args, **options):
+        authors, posts, groups = counters.recount(
+            dry_run=options["dry_run"]
+        )
+        action = "Найдено" if options["dry_run"] else "Исправлено"
+        self.stdout.write(
+            f"{action} расхождений: авторы - {authors}, посты - {posts}, "
+            f"группы - {groups}"
+        )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает пользователей, группы, посты, комментарии и подписки "
+        "в NDJSON (.gz - со сжатием, - - в stdout)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл дампа")
+        parser.add_argument(
+            "--media-dir", help="Куда скопировать картинки постов"
+        )
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        # При выгрузке в stdout отчет о ходе пишется в stderr
+        log = self.stderr.write if path == "-" else self.stdout.write
+        stream = transfer.open_dump(path, "w")
+        try:
+            transfer.export(
+                stream,
+                log=log,
+                media_dir=options["media_dir"],
+                workers=options["workers"],
+            )
+        finally:
+            if path != "-":
+                stream.close()
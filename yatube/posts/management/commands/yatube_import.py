@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = "Загружает дамп NDJSON, созданный командой yatube_export"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл дампа (- - из stdin)")
+        parser.add_argument(
+            "--media-dir", help="Откуда скопировать картинки постов"
+        )
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=20000,
+            help="Сколько записей загружать в одной транзакции",
+        )
+        parser.add_argument(
+            "--no-rebuild",
+            action="store_true",
+            help="Не пересчитывать счетчики, ленты и поисковый индекс",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        stream = transfer.open_dump(path, "r")
+        try:
+            transfer.load(
+                stream,
+                log=self.stdout.write,
+                batch_size=options["batch_size"],
+                chunk_size=options["chunk_size"],
+                media_dir=options["media_dir"],
+                workers=options["workers"],
+                rebuild=not options["no_rebuild"],
+            )
+        except IntegrityError as error:
+            raise CommandError(f"Дамп пересекается с данными в базе: {error}")
+        finally:
+            if path != "-":
+                stream.close()
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_search_index(apps, schema_editor):
+    from posts.search import weigh
+
+    Post = apps.get_model('posts', 'Post')
+    SearchEntry = apps.get_model('posts', 'SearchEntry')
+    for post in Post.objects.prefetch_related('comments'):
+        comments = [comment.text for comment in post.comments.all()]
+        SearchEntry.objects.bulk_create(
+            SearchEntry(term=term, post_id=post.pk, weight=weight)
+            for term, weight in weigh(post.text, comments).items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('weight', models.PositiveIntegerField(default=0, verbose_name='Вес')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='posts.Post')),
+            ],
+            options={
+                'verbose_name': 'Запись поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_entry'),
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:04
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_all(apps, schema_editor):
+    # Общая метка: страницы без своей метки не менялись с миграции
+    ChangeStamp = apps.get_model("posts", "ChangeStamp")
+    ChangeStamp.objects.create(scope="all", changed=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0014_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeStamp",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(max_length=16, verbose_name="Область"),
+                ),
+                (
+                    "object_id",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Объект"
+                    ),
+                ),
+                ("changed", models.DateTimeField(verbose_name="Изменено")),
+            ],
+            options={
+                "verbose_name": "Метка изменения",
+                "verbose_name_plural": "Метки изменений",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="changestamp",
+            constraint=models.UniqueConstraint(
+                fields=("scope", "object_id"), name="unique_change_stamp"
+            ),
+        ),
+        migrations.RunPython(stamp_all, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:14
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def count_groups(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    GroupStats = apps.get_model("posts", "GroupStats")
+    rows = (
+        Post.objects.filter(group__isnull=False)
+        .order_by()
+        .values("group")
+        .annotate(
+            posts_count=Count("pk"),
+            authors_count=Count("author", distinct=True),
+            last_post=Max("created"),
+        )
+    )
+    GroupStats.objects.bulk_create(
+        [GroupStats(group_id=row.pop("group"), **row) for row in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0015_change_stamps"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GroupStats",
+            fields=[
+                (
+                    "group",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="posts.Group",
+                    ),
+                ),
+                (
+                    "posts_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Постов"
+                    ),
+                ),
+                (
+                    "authors_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Авторов"
+                    ),
+                ),
+                (
+                    "last_post",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Последний пост"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика группы",
+                "verbose_name_plural": "Статистика групп",
+            },
+        ),
+        migrations.RunPython(count_groups, migrations.RunPython.noop),
+    ]
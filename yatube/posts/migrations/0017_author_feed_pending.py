@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0016_group_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="authorstats",
+            name="feed_pending",
+            field=models.BooleanField(
+                default=False, editable=False, verbose_name="Раздача в очереди"
+            ),
+        ),
+    ]
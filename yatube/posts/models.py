@@ -1,4 +1,5 @@
 from core.models import CreatedModel
+from core.paginators import map_union
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models import CheckConstraint, UniqueConstraint
@@ -19,6 +20,25 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа в том же запросе, без лишних
+        колонок, которые шаблоны лент не используют.
+        """
+        if self.query.combinator:
+            return map_union(self, PostQuerySet.for_feed)
+        return self.select_related("author", "group").defer(
+            "author__password",
+            "author__last_login",
+            "author__is_superuser",
+            "author__email",
+            "author__is_staff",
+            "author__is_active",
+            "author__date_joined",
+            "group__description",
+        )
+
+
 class Post(CreatedModel):
     text = models.TextField(validators=[clean_post])
     author = models.ForeignKey(
@@ -32,16 +52,40 @@ class Post(CreatedModel):
         null=True,
     )
     image = models.ImageField("Картинка", upload_to="posts/", blank=True)
+    comments_count = models.PositiveIntegerField(
+        "Комментариев", default=0, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created"]
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
+        # Ленты группы и профиля фильтруют по группе или автору и
+        # сортируют по -created, -pk: SQLite читает индекс с конца,
+        # rowid в индексе разрешает равенство created без сортировки
+        indexes = [
+            models.Index(
+                fields=["group", "created"], name="post_group_created_idx"
+            ),
+            models.Index(
+                fields=["author", "created"], name="post_author_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.text[:CUT_TEXT]
 
 
+class CommentQuerySet(models.QuerySet):
+    def for_thread(self):
+        """Комментарии для ветки под постом: из автора нужно только имя."""
+        return self.select_related("author").only(
+            "text", "created", "post_id", "author__username"
+        )
+
+
 class Comment(CreatedModel):
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name="comments"
@@ -51,10 +95,17 @@ class Comment(CreatedModel):
     )
     text = models.TextField()
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created"]
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(
+                fields=["post", "created"], name="comment_post_created_idx"
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -68,6 +119,12 @@ class Follow(models.Model):
     class Meta:
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
+        # Подписчики автора (раздача постов) читаются только из индекса
+        indexes = [
+            models.Index(
+                fields=["author", "user"], name="follow_author_user_idx"
+            ),
+        ]
         constraints = [
             UniqueConstraint(fields=["user", "author"], name="unique_follow"),
             CheckConstraint(
@@ -75,3 +132,104 @@ class Follow(models.Model):
                 name="no_follow_myself",
             ),
         ]
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок: пост автора во «входящих» подписчика."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    # Копия Post.created: страница ленты читается по индексу (user, created)
+    created = models.DateTimeField("Дата создания поста")
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        indexes = [
+            models.Index(
+                fields=["user", "created", "post"],
+                name="feed_user_created_post_idx",
+            ),
+        ]
+        constraints = [
+            UniqueConstraint(
+                fields=["user", "post"], name="unique_feed_entry"
+            ),
+        ]
+
+
+class AuthorStats(models.Model):
+    """Счетчики пользователя, которые поддерживаются сигналами."""
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    posts_count = models.PositiveIntegerField("Постов", default=0)
+    followers_count = models.PositiveIntegerField("Подписчиков", default=0)
+    following_count = models.PositiveIntegerField("Подписок", default=0)
+    # Автор опустился до FEED_FANOUT_LIMIT, но его посты еще не
+    # разложены по лентам: ленты добирают их при чтении
+    feed_pending = models.BooleanField(
+        "Раздача в очереди", default=False, editable=False
+    )
+
+    class Meta:
+        verbose_name = "Счетчики автора"
+        verbose_name_plural = "Счетчики авторов"
+
+
+class GroupStats(models.Model):
+    """Статистика группы для каталога групп, поддерживается сигналами."""
+
+    group = models.OneToOneField(
+        Group, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    posts_count = models.PositiveIntegerField("Постов", default=0)
+    authors_count = models.PositiveIntegerField("Авторов", default=0)
+    last_post = models.DateTimeField("Последний пост", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Статистика группы"
+        verbose_name_plural = "Статистика групп"
+
+
+class SearchEntry(models.Model):
+    """Запись обратного индекса: основа слова и его вес в посте."""
+
+    term = models.CharField("Основа слова", max_length=64)
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="search_entries"
+    )
+    weight = models.PositiveIntegerField("Вес", default=0)
+
+    class Meta:
+        verbose_name = "Запись поискового индекса"
+        verbose_name_plural = "Поисковый индекс"
+        constraints = [
+            UniqueConstraint(
+                fields=["term", "post"], name="unique_search_entry"
+            ),
+        ]
+
+
+class ChangeStamp(models.Model):
+    """Время последнего изменения страниц одной области: ленты, группы,
+    профиля автора или поста. Поддерживается сигналами.
+    """
+
+    scope = models.CharField("Область", max_length=16)
+    object_id = models.PositiveIntegerField("Объект", default=0)
+    changed = models.DateTimeField("Изменено")
+
+    class Meta:
+        verbose_name = "Метка изменения"
+        verbose_name_plural = "Метки изменений"
+        constraints = [
+            UniqueConstraint(
+                fields=["scope", "object_id"], name="unique_change_stamp"
+            ),
+        ]
@@ -0,0 +1,254 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Тексты разбиваются на слова, слова приводятся к основе стеммером Портера
+для русского языка и складываются в обратный индекс SearchEntry
+(основа -> пост, вес). Индекс поста пересобирается сигналами при
+изменении поста или его комментариев, поэтому запрос к поиску читает
+только индекс и не сканирует таблицу постов через LIKE '%q%'.
+"""
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Greatest
+
+from posts.models import Comment, Post, SearchEntry
+
+# Слово текста поста весит больше, чем слово комментария
+POST_WEIGHT = 3
+COMMENT_WEIGHT = 1
+MAX_QUERY_TERMS = 10
+# Число постов для idf: точность не важна, поэтому оно кешируется
+TOTAL_KEY = "posts:search:total"
+TOTAL_TIMEOUT = 600
+TERM_LENGTH = 64
+
+WORD = re.compile(r"\w+")
+STOP_WORDS = frozenset(
+    "и в во не что он на я с со как а то все она так его но да ты к у же "
+    "вы за бы по только ее мне было вот от меня еще нет о из ему теперь "
+    "когда даже ну вдруг ли если уже или ни быть был него до вас нибудь "
+    "опять уж вам ведь там потом себя ничего ей может они тут где есть "
+    "надо ней для мы тебя их чем была сам чтоб без будто чего раз тоже "
+    "себе под будет ж тогда кто этот того потому этого какой совсем ним "
+    "здесь этом один почти мой тем чтобы нее были куда зачем всех "
+    "никогда можно при наконец два об другой хоть после над больше тот "
+    "через эти нас про всего них какая много разве три эту моя впрочем "
+    "хорошо свою этой перед иногда лучше чуть том нельзя такой им более "
+    "всегда конечно всю между the a an of to in and or is are".split()
+)
+
+# Стеммер Портера для русского языка (Snowball)
+VOWELS = "аеиоуыэюя"
+RV = re.compile(rf"^(.*?[{VOWELS}])(.*)$")
+PERFECTIVE_GERUND = re.compile(
+    r"((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$"
+)
+REFLEXIVE = re.compile(r"(с[яь])$")
+ADJECTIVE = re.compile(
+    r"(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых"
+    r"|ую|юю|ая|яя|ою|ею)$"
+)
+PARTICIPLE = re.compile(r"((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$")
+VERB = re.compile(
+    r"((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло"
+    r"|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)"
+    r"|((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$"
+)
+NOUN = re.compile(
+    r"(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем"
+    r"|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$"
+)
+DERIVATIONAL = re.compile(rf".*[^{VOWELS}]+[{VOWELS}].*ость?$")
+SUPERLATIVE = re.compile(r"(ейше|ейш)$")
+
+
+# Слова в текстах повторяются: основы запоминаются
+@lru_cache(maxsize=100000)
+def stem(word):
+    """Основа русского слова; остальные слова не меняются."""
+    match = RV.match(word)
+    if not match:
+        return word
+    start, rv = match.groups()
+    ending = PERFECTIVE_GERUND.sub("", rv, 1)
+    if ending == rv:
+        rv = REFLEXIVE.sub("", rv, 1)
+        ending = ADJECTIVE.sub("", rv, 1)
+        if ending != rv:
+            rv = PARTICIPLE.sub("", ending, 1)
+        else:
+            ending = VERB.sub("", rv, 1)
+            rv = NOUN.sub("", rv, 1) if ending == rv else ending
+    else:
+        rv = ending
+    rv = re.sub("и$", "", rv, 1)
+    if DERIVATIONAL.match(rv):
+        rv = re.sub("ость?$", "", rv, 1)
+    if rv.endswith("ь"):
+        rv = rv[:-1]
+    else:
+        rv = SUPERLATIVE.sub("", rv, 1)
+        rv = re.sub("нн$", "н", rv, 1)
+    return start + rv
+
+
+def terms(text):
+    """Основы значимых слов текста в порядке появления."""
+    result = []
+    for word in WORD.findall(text.lower().replace("ё", "е")):
+        if len(word) < 2 or word in STOP_WORDS:
+            continue
+        result.append(stem(word)[:TERM_LENGTH])
+    return result
+
+
+def weigh(post_text, comment_texts):
+    """Вес каждой основы в посте с учетом его комментариев."""
+    weights = Counter()
+    for term in terms(post_text):
+        weights[term] += POST_WEIGHT
+    for text in comment_texts:
+        for term in terms(text):
+            weights[term] += COMMENT_WEIGHT
+    return weights
+
+
+def index_posts(post_ids):
+    """Пересобирает записи индекса для постов."""
+    post_ids = list(post_ids)
+    comments = {}
+    for post_id, text in Comment.objects.filter(
+        post_id__in=post_ids
+    ).values_list("post_id", "text"):
+        comments.setdefault(post_id, []).append(text)
+    rows = [
+        (term, post_id, weight)
+        for post_id, text in Post.objects.filter(pk__in=post_ids).values_list(
+            "pk", "text"
+        )
+        for term, weight in weigh(text, comments.get(post_id, ())).items()
+    ]
+    SearchEntry.objects.filter(post_id__in=post_ids).delete()
+    # Записей в десятки раз больше, чем постов: вставка без создания
+    # объектов моделей, многострочными INSERT. Не executemany - его
+    # параметры ломает SQL-панель debug_toolbar
+    fields = [
+        SearchEntry._meta.get_field(name)
+        for name in ("term", "post", "weight")
+    ]
+    batch = connection.ops.bulk_batch_size(fields, rows) or len(rows)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch):
+            end = start + batch
+            chunk = rows[start:end]
+            cursor.execute(
+                f"INSERT INTO {SearchEntry._meta.db_table}"
+                " (term, post_id, weight) VALUES "
+                + ", ".join(["(%s, %s, %s)"] * len(chunk)),
+                [value for row in chunk for value in row],
+            )
+
+
+def change_comment(post_id, text, sign):
+    """Добавляет (sign=1) или вычитает (sign=-1) слова комментария из
+    индекса поста, не перечитывая остальные комментарии.
+    """
+    weights = weigh("", [text])
+    # Основы с одинаковым приращением веса меняются одним UPDATE
+    deltas = {}
+    for term, weight in weights.items():
+        deltas.setdefault(sign * weight, []).append(term)
+    entries = SearchEntry.objects.filter(post_id=post_id)
+    existing = set(
+        entries.filter(term__in=list(weights)).values_list("term", flat=True)
+    )
+    for delta, changed in deltas.items():
+        entries.filter(term__in=changed).update(
+            weight=Greatest(F("weight") + delta, 0)
+        )
+    if sign > 0:
+        SearchEntry.objects.bulk_create(
+            SearchEntry(term=term, post_id=post_id, weight=delta)
+            for delta, changed in deltas.items()
+            for term in changed
+            if term not in existing
+        )
+    else:
+        entries.filter(weight=0).delete()
+
+
+def rebuild(batch_size=500):
+    """Пересобирает индекс всех постов; возвращает их число."""
+    SearchEntry.objects.all().delete()
+    post_ids = list(Post.objects.values_list("pk", flat=True))
+    for start in range(0, len(post_ids), batch_size):
+        end = start + batch_size
+        index_posts(post_ids[start:end])
+    return len(post_ids)
+
+
+def search(query, queryset=None):
+    """Посты, содержащие слова запроса, по убыванию релевантности.
+
+    Релевантность - сумма весов найденных основ, умноженных на их
+    обратную частоту (idf): редкие слова важнее частых.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    query_terms = list(dict.fromkeys(terms(query)))[:MAX_QUERY_TERMS]
+    # Пустой результат тоже с rank: по нему сортирует админка
+    nothing = queryset.annotate(
+        rank=Value(0.0, output_field=FloatField())
+    ).none()
+    if not query_terms:
+        return nothing
+    total = cache.get_or_set(TOTAL_KEY, Post.objects.count, TOTAL_TIMEOUT)
+    frequencies = dict(
+        SearchEntry.objects.filter(term__in=query_terms)
+        .order_by()
+        .values("term")
+        .annotate(posts=Count("post"))
+        .values_list("term", "posts")
+    )
+    if not frequencies:
+        return nothing
+    score = Case(
+        *[
+            When(
+                term=term,
+                then=F("weight")
+                * Value(math.log(1 + max(total, posts) / posts)),
+            )
+            for term, posts in frequencies.items()
+        ],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    matches = SearchEntry.objects.filter(term__in=list(frequencies))
+    rank = (
+        matches.filter(post=OuterRef("pk"))
+        .order_by()
+        .values("post")
+        .annotate(rank=Sum(score))
+        .values("rank")
+    )
+    return (
+        queryset.filter(pk__in=matches.values("post"))
+        .annotate(rank=Subquery(rank, output_field=FloatField()))
+        .order_by("-rank", "-created", "-pk")
+    )
@@ -7,3 +7,8 @@ class PostSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ("id", "text", "author", "image", "created")
         model = Post
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Запрос для списка постов без дополнительных запросов на пост."""
+        return queryset.for_feed()
@@ -0,0 +1,246 @@
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from posts import (
+    counters,
+    directory,
+    feed,
+    follows,
+    search,
+    snapshots,
+    stamps,
+    thumbnails,
+)
+from posts.fragments import invalidate_post_cards
+from posts.models import Comment, Follow, Group, Post, User
+
+
+# Счетчики подключены первыми: лента читает уже обновленное
+# число подписчиков автора.
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author(instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_author(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author(instance.author_id, followers_count=1)
+        counters.change_author(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change_author(instance.author_id, followers_count=-1)
+    counters.change_author(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def count_group_post(sender, instance, created, **kwargs):
+    previous_group_id = getattr(instance, "previous_group_id", None)
+    if created:
+        counters.add_group_post(instance, instance.group_id)
+    elif previous_group_id != instance.group_id:
+        counters.remove_group_post(instance, previous_group_id)
+        counters.add_group_post(instance, instance.group_id)
+    else:
+        return
+    directory.invalidate()
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_group_post(sender, instance, **kwargs):
+    # При удалении группы посты отвязываются (SET_NULL) без сигналов,
+    # а статистика группы удаляется каскадом вместе с ней
+    if instance.group_id is not None:
+        counters.remove_group_post(instance, instance.group_id)
+        directory.invalidate()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_directory(sender, **kwargs):
+    directory.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        feed.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_feed(sender, instance, **kwargs):
+    feed.on_unfollow(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_card(sender, instance, **kwargs):
+    invalidate_post_cards([instance.pk])
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group_cards(sender, instance, **kwargs):
+    invalidate_post_cards(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cards(
+    sender, instance, created, update_fields=None, **kwargs
+):
+    # Вход пользователя сохраняет только last_login - карточки не меняются
+    if created or update_fields and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_post_cards(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_followees(sender, instance, **kwargs):
+    follows.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, **kwargs):
+    if instance.image:
+        thumbnails.schedule(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or "text" in update_fields:
+        search.index_posts([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, created, **kwargs):
+    if created:
+        search.change_comment(instance.post_id, instance.text, 1)
+    else:
+        search.index_posts([instance.post_id])
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    # При удалении поста его записи индекса уже удалены каскадом
+    search.change_comment(instance.post_id, instance.text, -1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # Пост могут перенести в другую группу - прежняя тоже меняется
+    instance.previous_group_id = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list("group_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def stamp_post(sender, instance, **kwargs):
+    stamps.touch_post(instance, [getattr(instance, "previous_group_id", None)])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def stamp_comment(sender, instance, **kwargs):
+    stamps.touch((stamps.POST, instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def stamp_follow(sender, instance, **kwargs):
+    # Число подписчиков - на странице автора, кнопки подписки - во всех
+    # лентах подписчика
+    stamps.touch(
+        (stamps.AUTHOR, instance.author_id), (stamps.VIEWER, instance.user_id)
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def stamp_group(sender, instance, created=False, **kwargs):
+    # Название группы есть в карточках всех лент
+    if not created:
+        stamps.touch_all()
+
+
+@receiver(post_save, sender=User)
+def stamp_user(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields and set(update_fields) <= {"last_login"}:
+        return
+    stamps.touch_all()
+
+
+@receiver(pre_save, sender=Group)
+def remember_slug(sender, instance, **kwargs):
+    # Снимок прежнего адреса группы нужно удалить
+    instance.previous_slug = (
+        Group.objects.filter(pk=instance.pk)
+        .values_list("slug", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def snapshot_post(sender, instance, **kwargs):
+    snapshots.post_changed(
+        instance, [getattr(instance, "previous_group_id", None)]
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def snapshot_comment(sender, instance, **kwargs):
+    snapshots.comment_changed(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def snapshot_follow(sender, instance, **kwargs):
+    snapshots.follow_changed(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def snapshot_group(sender, instance, created=False, **kwargs):
+    # При удалении посты группы еще не отвязаны
+    snapshots.group_changed(
+        instance, getattr(instance, "previous_slug", None), created=created
+    )
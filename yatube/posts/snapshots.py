@@ -0,0 +1,101 @@
+"""Какие страницы снимать для анонимных посетителей и какие из них
+перерисовывать после изменений.
+
+Снимаются первые страницы главной ленты, групп и авторов и страницы
+постов; следующие страницы курсора (?cursor=) рендерятся как обычно.
+Сигналы передают в core.snapshots только адреса, которые изменение
+затрагивает, по тем же правилам, что и метки stamps. Страницы, где
+изменение видно лишь мелко (название группы в карточках),
+перерисовываются, только если снимок уже есть. Число постов автора на
+страницах его прежних постов при новом посте не перерисовывается - это
+O(N) снимков на пост: оно обновится при следующей перерисовке страницы
+(комментарий, правка) или пересборке. Правки пользователей и загрузки
+в обход сигналов требуют полной пересборки командой build_snapshots.
+"""
+from core import snapshots
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+def _path(name, *args):
+    return snapshots.url_path(reverse(name, args=args))
+
+
+def _existing(paths):
+    return [path for path in paths if snapshots.exists(path)]
+
+
+def _profile_paths(user_ids):
+    usernames = User.objects.filter(pk__in=user_ids).values_list(
+        "username", flat=True
+    )
+    return [_path("posts:profile", username) for username in usernames]
+
+
+def _post_pages(posts):
+    return [_path("posts:post_detail", pk) for pk in posts]
+
+
+def all_paths(posts=None):
+    """Адреса всех снимков; posts - сколько последних постов снимать,
+    None - все.
+    """
+    yield _path("posts:index")
+    for slug in Group.objects.values_list("slug", flat=True):
+        yield _path("posts:group_list", slug)
+    authors = User.objects.filter(posts__isnull=False).distinct()
+    yield from _profile_paths(authors.values("pk"))
+    post_ids = Post.objects.order_by("-pk").values_list("pk", flat=True)
+    yield from _post_pages(post_ids[:posts] if posts else post_ids)
+
+
+def post_changed(post, group_ids=()):
+    """Пост виден в главной ленте, в группе, у автора и на своей
+    странице; group_ids - прежние группы поста.
+    """
+    if not snapshots.enabled():
+        return
+    group_ids = {post.group_id, *group_ids} - {None}
+    paths = [
+        _path("posts:index"),
+        _path("posts:post_detail", post.pk),
+        *_profile_paths([post.author_id]),
+        *(
+            _path("posts:group_list", slug)
+            for slug in Group.objects.filter(pk__in=group_ids).values_list(
+                "slug", flat=True
+            )
+        ),
+    ]
+    snapshots.schedule(paths)
+
+
+def comment_changed(comment):
+    if snapshots.enabled():
+        snapshots.schedule([_path("posts:post_detail", comment.post_id)])
+
+
+def follow_changed(follow):
+    """Число подписчиков видно на странице автора."""
+    if snapshots.enabled():
+        snapshots.schedule(_profile_paths([follow.author_id]))
+
+
+def group_changed(group, previous_slug=None, created=False):
+    """Страница группы (и прежнего адреса при смене slug), а для
+    существующей группы еще главная лента и уже снятые страницы авторов
+    и постов группы.
+    """
+    if not snapshots.enabled():
+        return
+    slugs = {group.slug, previous_slug} - {None}
+    paths = [_path("posts:group_list", slug) for slug in slugs]
+    if not created:
+        posts = Post.objects.filter(group=group)
+        paths.append(_path("posts:index"))
+        paths += _existing(
+            _profile_paths(posts.values("author_id"))
+            + _post_pages(posts.values_list("pk", flat=True))
+        )
+    snapshots.schedule(paths)
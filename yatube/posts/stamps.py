@@ -0,0 +1,153 @@
+"""Метки последнего изменения страниц для условных GET-запросов.
+
+Сигналы обновляют время изменения каждой затронутой области: главной
+ленты, группы, автора, поста. ETag и Last-Modified страницы строятся
+по наибольшей метке ее областей одним запросом к ChangeStamp, и
+неизмененная страница получает 304 без рендеринга шаблонов. Правки,
+которые видны везде (имя автора, название группы), и загрузки в обход
+сигналов сдвигают общую метку ALL.
+"""
+import hashlib
+
+from django.db.models import Max, Q
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from posts import follows
+from posts.models import ChangeStamp, Group, Post, User
+
+ALL = "all"
+INDEX = "index"
+GROUP = "group"
+AUTHOR = "author"
+POST = "post"
+# Подписки зрителя: от них зависят кнопки подписки в лентах
+VIEWER = "viewer"
+
+
+def touch(*scopes):
+    """Отмечает изменение областей: touch((GROUP, 1), (POST, 5)).
+    Области с object_id=None пропускаются.
+    """
+    scopes = {
+        (scope, object_id)
+        for scope, object_id in scopes
+        if object_id is not None
+    }
+    if not scopes:
+        return
+    now = timezone.now()
+    query = Q()
+    for scope, object_id in scopes:
+        query |= Q(scope=scope, object_id=object_id)
+    # Обычно метки уже есть и хватает одного UPDATE
+    if ChangeStamp.objects.filter(query).update(changed=now) < len(scopes):
+        ChangeStamp.objects.bulk_create(
+            [
+                ChangeStamp(scope=scope, object_id=object_id, changed=now)
+                for scope, object_id in scopes
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def touch_all():
+    touch((ALL, 0))
+
+
+def touch_post(post, group_ids=()):
+    """Пост виден в главной ленте, в группе, у автора и на своей
+    странице; group_ids - прежние группы поста.
+    """
+    touch(
+        (INDEX, 0),
+        (AUTHOR, post.author_id),
+        (POST, post.pk),
+        (GROUP, post.group_id),
+        *((GROUP, group_id) for group_id in group_ids),
+    )
+
+
+def last_changed(query):
+    """Наибольшая метка областей query с учетом общей метки."""
+    return ChangeStamp.objects.filter(query | Q(scope=ALL)).aggregate(
+        changed=Max("changed")
+    )["changed"]
+
+
+def index_scopes(request):
+    return Q(scope=INDEX)
+
+
+def group_scopes(request, slug):
+    return Q(
+        scope=GROUP,
+        object_id__in=Group.objects.filter(slug=slug).values("pk"),
+    )
+
+
+def profile_scopes(request, username):
+    return Q(
+        scope=AUTHOR,
+        object_id__in=User.objects.filter(username=username).values("pk"),
+    )
+
+
+def post_scopes(request, post_id):
+    # На странице поста есть и число постов автора
+    return Q(scope=POST, object_id=post_id) | Q(
+        scope=AUTHOR,
+        object_id__in=Post.objects.filter(pk=post_id).values("author_id"),
+    )
+
+
+def follow_scopes(request):
+    # Подписки зрителя учитывает viewer_scopes
+    return Q(scope=AUTHOR, object_id__in=follows.followees(request.user.pk))
+
+
+def viewer_scopes(request):
+    if request.user.is_authenticated:
+        return Q(scope=VIEWER, object_id=request.user.pk)
+    return Q()
+
+
+def page_condition(scopes):
+    """condition() по меткам областей scopes(request, **kwargs).
+
+    ETag учитывает пользователя и полный путь: страницы различаются
+    для разных пользователей и страниц курсора. Страница вошедшего
+    пользователя содержит CSRF-токен форм, поэтому его ETag учитывает и
+    токен (он меняется при входе), а Last-Modified у нее нет.
+    """
+
+    def changed(request, *args, **kwargs):
+        if not hasattr(request, "last_changed"):
+            request.last_changed = last_changed(
+                scopes(request, *args, **kwargs) | viewer_scopes(request)
+            )
+        return request.last_changed
+
+    def etag(request, *args, **kwargs):
+        stamp = changed(request, *args, **kwargs)
+        if stamp is None:
+            return None
+        user = ""
+        if request.user.is_authenticated:
+            # get_token создает cookie с токеном, если ее нет, и выставит
+            # ее и в ответе 304; сам он каждый раз маскируется заново,
+            # поэтому в ETag идет значение cookie
+            get_token(request)
+            user = f"{request.user.pk}:{request.META['CSRF_COOKIE']}"
+        data = f"{stamp.isoformat()}:{user}:{request.get_full_path()}"
+        return hashlib.md5(data.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        # По одной дате страница с токеном до повторного входа совпала
+        # бы с новой
+        if request.user.is_authenticated:
+            return None
+        return changed(request, *args, **kwargs)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
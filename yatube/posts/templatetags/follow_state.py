@@ -0,0 +1,18 @@
+from django import template
+
+from posts import follows
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def followed_authors(context, posts):
+    """id авторов из posts, на которых подписан зритель.
+
+    Подписки читаются одним обращением к кешу на всю страницу, поэтому
+    кнопки подписки в строках ленты не ходят в базу.
+    """
+    user = context.get("user")
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    return follows.followees(user.pk) & {post.author_id for post in posts}
@@ -0,0 +1,34 @@
+import logging
+
+from django import template
+from sorl.thumbnail import get_thumbnail
+
+from posts import thumbnails
+
+logger = logging.getLogger(__name__)
+register = template.Library()
+
+
+@register.inclusion_tag("posts/includes/thumbnail.html")
+def responsive_thumbnail(image, size):
+    """Миниатюра size с srcset из меньших ширин той же пропорции."""
+    if not image:
+        return {}
+    try:
+        variants = [
+            (
+                width,
+                get_thumbnail(image, geometry, **thumbnails.THUMBNAIL_OPTIONS),
+            )
+            for width, geometry in thumbnails.variants(size)
+        ]
+    except Exception:
+        # Как и {% thumbnail %}: без картинки, но страница рендерится
+        logger.exception("Не удалось получить миниатюры %s", image)
+        return {}
+    width, largest = variants[-1]
+    return {
+        "src": largest.url,
+        "srcset": ", ".join(f"{im.url} {width}w" for width, im in variants),
+        "width": width,
+    }
@@ -0,0 +1,111 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.reader = User.objects.create_user(username="TestReader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_slug",
+            description="Тестовое описание",
+        )
+        Post.objects.bulk_create(
+            [
+                Post(text=f"Пост {i}", author=cls.author, group=cls.group)
+                for i in range(13)
+            ]
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def get_json(self, client, url, **extra):
+        response = client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        return response, json.loads(b"".join(response.streaming_content))
+
+    def test_feeds_stream_posts_by_cursor(self):
+        """Ленты API отдают страницы по курсору в обе стороны."""
+        urls = [
+            (self.client, reverse("posts:api_index")),
+            (
+                self.client,
+                reverse("posts:api_group", kwargs={"slug": "test_slug"}),
+            ),
+            (
+                self.client,
+                reverse(
+                    "posts:api_profile", kwargs={"username": "TestAuthor"}
+                ),
+            ),
+            (self.authorized_client, reverse("posts:api_follow")),
+        ]
+        for client, url in urls:
+            with self.subTest(url=url):
+                _, first = self.get_json(client, url)
+                self.assertEqual(len(first["results"]), 10)
+                self.assertIsNone(first["previous"])
+                _, second = self.get_json(client, first["next"])
+                self.assertEqual(len(second["results"]), 3)
+                self.assertIsNone(second["next"])
+                _, back = self.get_json(client, second["previous"])
+                self.assertEqual(back["results"], first["results"])
+                self.assertIsNone(back["previous"])
+
+    def test_follow_feed_requires_login(self):
+        """Лента подписок API недоступна анониму."""
+        response = self.client.get(reverse("posts:api_follow"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_conditional_requests(self):
+        """Неизмененная лента отдает 304, новый пост сбрасывает ETag."""
+        url = reverse("posts:api_index")
+        response, _ = self.get_json(self.client, url)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text="Новый пост", author=self.author)
+        response, data = self.get_json(
+            self.client, url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(data["results"][0]["text"], "Новый пост")
+
+    def test_conditional_requests_by_scope(self):
+        """ETag ленты меняют только посты, которые в ней видны."""
+        other = User.objects.create_user(username="Other")
+        group_url = reverse("posts:api_group", kwargs={"slug": "test_slug"})
+        follow_url = reverse("posts:api_follow")
+        Post.objects.create(text="Пост", author=self.author, group=self.group)
+        group, _ = self.get_json(self.client, group_url)
+        follow, _ = self.get_json(self.authorized_client, follow_url)
+        Post.objects.create(text="Пост другого автора", author=other)
+        response = self.client.get(group_url, HTTP_IF_NONE_MATCH=group["ETag"])
+        self.assertEqual(response.status_code, 304)
+        response = self.authorized_client.get(
+            follow_url, HTTP_IF_NONE_MATCH=follow["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+        Follow.objects.create(user=self.reader, author=other)
+        self.get_json(
+            self.authorized_client,
+            follow_url,
+            HTTP_IF_NONE_MATCH=follow["ETag"],
+        )
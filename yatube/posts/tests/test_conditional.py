@@ -0,0 +1,163 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import stamps
+from posts.models import ChangeStamp, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.reader = User.objects.create_user(username="TestReader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа", slug="test-slug", description="Описание"
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая группа", slug="other-slug", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            text="Текст", author=cls.author, group=cls.group
+        )
+        cls.group_url = reverse(
+            "posts:group_list", kwargs={"slug": "test-slug"}
+        )
+        cls.profile_url = reverse(
+            "posts:profile", kwargs={"username": "TestAuthor"}
+        )
+        cls.detail_url = reverse(
+            "posts:post_detail", kwargs={"post_id": cls.post.pk}
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def etag(self, url, client=None):
+        return (client or self.client).get(url)["ETag"]
+
+    def test_pages_have_validators(self):
+        """Публичные страницы отдают ETag и Last-Modified."""
+        urls = [
+            reverse("posts:index"),
+            self.group_url,
+            self.profile_url,
+            self.detail_url,
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.has_header("ETag"))
+                self.assertTrue(response.has_header("Last-Modified"))
+
+    def test_not_modified_skips_rendering(self):
+        """Повторный запрос с If-None-Match получает 304 без рендеринга
+        и с одним запросом к базе.
+        """
+        etag = self.etag(self.group_url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.group_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.templates, [])
+        self.assertEqual(response.content, b"")
+
+    def test_if_modified_since(self):
+        """Страница не изменилась с даты Last-Modified - ответ 304."""
+        last_modified = self.client.get(self.detail_url)["Last-Modified"]
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_group_only(self):
+        """Новый пост в группе меняет ETag группы, но не другой группы."""
+        other_url = reverse("posts:group_list", kwargs={"slug": "other-slug"})
+        group_etag = self.etag(self.group_url)
+        other_etag = self.etag(other_url)
+        Post.objects.create(text="Новый", author=self.reader, group=self.group)
+        self.assertNotEqual(self.etag(self.group_url), group_etag)
+        self.assertEqual(self.etag(other_url), other_etag)
+
+    def test_moving_post_changes_previous_group(self):
+        """Перенос поста в другую группу меняет ETag прежней группы."""
+        post = Post.objects.create(
+            text="Переносимый", author=self.reader, group=self.group
+        )
+        group_etag = self.etag(self.group_url)
+        post.group = self.other_group
+        post.save()
+        self.assertNotEqual(self.etag(self.group_url), group_etag)
+
+    def test_comment_changes_post_only(self):
+        """Комментарий меняет ETag поста, но не группы."""
+        detail_etag = self.etag(self.detail_url)
+        group_etag = self.etag(self.group_url)
+        Comment.objects.create(
+            text="Комментарий", author=self.reader, post=self.post
+        )
+        self.assertNotEqual(self.etag(self.detail_url), detail_etag)
+        self.assertEqual(self.etag(self.group_url), group_etag)
+
+    def test_follow_changes_profile(self):
+        """Подписка меняет ETag профиля автора."""
+        profile_etag = self.etag(self.profile_url)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertNotEqual(self.etag(self.profile_url), profile_etag)
+
+    def test_group_rename_changes_everything(self):
+        """Правка группы сдвигает общую метку всех страниц."""
+        detail_etag = self.etag(self.detail_url)
+        self.group.title = "Новое название"
+        self.group.save()
+        self.assertNotEqual(self.etag(self.detail_url), detail_etag)
+
+    def test_etag_depends_on_user(self):
+        """Гость и пользователь получают разные ETag."""
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        self.assertNotEqual(
+            self.etag(self.group_url),
+            self.etag(self.group_url, reader_client),
+        )
+
+    def test_relogin_changes_etag(self):
+        """После повторного входа страница с формой комментария
+        перерисовывается с новым CSRF-токеном, а не отдается 304.
+        """
+        self.reader.set_password("password")
+        self.reader.save()
+        client = Client()
+
+        def login():
+            client.post(
+                reverse("users:login"),
+                {"username": "TestReader", "password": "password"},
+            )
+
+        login()
+        etag = self.etag(self.detail_url, client)
+        client.get(reverse("users:logout"))
+        login()
+        response = client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "csrfmiddlewaretoken")
+        self.assertFalse(response.has_header("Last-Modified"))
+        response = client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_touch_creates_missing_stamps(self):
+        """touch() создает недостающие метки и пропускает None."""
+        stamps.touch((stamps.GROUP, 999), (stamps.POST, None))
+        self.assertIsNotNone(
+            stamps.last_changed(stamps.group_scopes(None, "absent"))
+        )
+        self.assertEqual(
+            ChangeStamp.objects.filter(
+                scope=stamps.GROUP, object_id=999
+            ).count(),
+            1,
+        )
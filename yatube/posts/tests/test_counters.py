@@ -0,0 +1,84 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from posts.models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.reader = User.objects.create_user(username="TestReader")
+        cls.post = Post.objects.create(text="Текст", author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_counters_follow_changes(self):
+        """Счетчики меняются при создании и удалении объектов."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        comment = Comment.objects.create(
+            text="Комментарий", author=self.reader, post=self.post
+        )
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.reader).following_count, 1
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        comment.delete()
+        follow.delete()
+        stats.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual(stats.followers_count, 0)
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_pages_render_without_count_queries(self):
+        """Профиль и пост выводят счетчики без агрегирующих запросов."""
+        urls = [
+            reverse("posts:profile", kwargs={"username": "TestAuthor"}),
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk}),
+        ]
+        # Один из запросов - метка изменения страницы для ETag
+        for url in urls:
+            with self.subTest(url=url):
+                with self.assertNumQueries(3):
+                    response = self.client.get(url)
+                self.assertEqual(response.context["count"], 1)
+
+    def test_recount_command_repairs_drift(self):
+        """Команда recount_counters исправляет расхождения."""
+        Post.objects.bulk_create(
+            [Post(text="Текст", author=self.author) for i in range(3)]
+        )
+        AuthorStats.objects.filter(user=self.author).update(followers_count=5)
+        out = StringIO()
+        call_command("recount_counters", stdout=out)
+        self.assertIn("авторы - 1", out.getvalue())
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 4)
+        self.assertEqual(stats.followers_count, 0)
+
+
+class UserDeletionTest(TransactionTestCase):
+    def test_delete_user_with_posts_and_follows(self):
+        """Удаление пользователя не создает заново его счетчики."""
+        author = User.objects.create_user(username="TestAuthor")
+        reader = User.objects.create_user(username="TestReader")
+        Post.objects.create(text="Текст", author=author)
+        Follow.objects.create(user=reader, author=author)
+        Follow.objects.create(user=author, author=reader)
+        author.delete()
+        self.assertFalse(AuthorStats.objects.filter(user=author.pk).exists())
+        stats = AuthorStats.objects.get(user=reader)
+        self.assertEqual(
+            (stats.followers_count, stats.following_count), (0, 0)
+        )
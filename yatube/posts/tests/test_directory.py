@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from posts import counters
+from posts.models import Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.reader = User.objects.create_user(username="TestReader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая группа", slug="other", description="Описание"
+        )
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_stats_follow_posts(self):
+        """Статистика меняется при создании, переносе и удалении постов."""
+        first = Post.objects.create(
+            text="Первый", author=self.author, group=self.group
+        )
+        Post.objects.create(
+            text="Второй", author=self.author, group=self.group
+        )
+        last = Post.objects.create(
+            text="Третий", author=self.reader, group=self.group
+        )
+        stats = self.stats(self.group)
+        self.assertEqual((stats.posts_count, stats.authors_count), (3, 2))
+        self.assertEqual(stats.last_post, last.created)
+
+        last.group = self.other_group
+        last.save()
+        stats = self.stats(self.group)
+        self.assertEqual((stats.posts_count, stats.authors_count), (2, 1))
+        self.assertLess(stats.last_post, last.created)
+        self.assertEqual(self.stats(self.other_group).authors_count, 1)
+
+        first.delete()
+        stats = self.stats(self.group)
+        self.assertEqual((stats.posts_count, stats.authors_count), (1, 1))
+
+    def test_bulk_delete_recounts_authors(self):
+        """Удаление пачки постов одного автора не уменьшает число
+        авторов на каждый пост.
+        """
+        for _ in range(3):
+            Post.objects.create(
+                text="Пост", author=self.author, group=self.group
+            )
+        Post.objects.create(text="Пост", author=self.reader, group=self.group)
+        Post.objects.filter(author=self.author).delete()
+        stats = self.stats(self.group)
+        self.assertEqual((stats.posts_count, stats.authors_count), (1, 1))
+
+    def test_group_delete_removes_stats(self):
+        """Удаление группы удаляет ее статистику, посты остаются."""
+        group = Group.objects.create(
+            title="Удаляемая", slug="deleted", description="Описание"
+        )
+        post = Post.objects.create(
+            text="Пост", author=self.author, group=group
+        )
+        group.delete()
+        post.refresh_from_db()
+        self.assertIsNone(post.group)
+        self.assertFalse(GroupStats.objects.filter(group_id=group.pk).exists())
+
+    def test_recount_repairs_group_stats(self):
+        """recount() исправляет статистику групп после массовой вставки."""
+        Post.objects.bulk_create(
+            [
+                Post(text="Текст", author=self.author, group=self.group)
+                for i in range(3)
+            ]
+        )
+        self.assertEqual(counters.recount()[2], 1)
+        self.assertEqual(self.stats(self.group).posts_count, 3)
+        self.assertEqual(counters.recount()[2], 0)
+
+    def test_directory_cached(self):
+        """Каталог групп из кеша рендерится без запросов к базе."""
+        cache.clear()
+        Post.objects.create(text="Пост", author=self.author, group=self.group)
+        client = Client()
+        url = reverse("posts:group_index")
+        response = client.get(url)
+        self.assertEqual(
+            [group["title"] for group in response.context["groups"]],
+            ["Группа", "Другая группа"],
+        )
+        self.assertEqual(response.context["groups"][0]["posts_count"], 1)
+        self.assertContains(response, "Постов: 1, авторов: 1")
+        with self.assertNumQueries(0):
+            client.get(url)
+
+
+class GroupDirectoryInvalidationTest(TransactionTestCase):
+    def test_new_post_invalidates_directory(self):
+        """Новый пост сбрасывает кеш каталога после коммита."""
+        cache.clear()
+        author = User.objects.create_user(username="TestAuthor")
+        group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        url = reverse("posts:group_index")
+        self.assertContains(self.client.get(url), "Постов: 0")
+        Post.objects.create(text="Пост", author=author, group=group)
+        self.assertContains(self.client.get(url), "Постов: 1")
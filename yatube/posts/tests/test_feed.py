@@ -0,0 +1,76 @@
+from core.models import Task
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from posts import feed
+from posts.models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.reader = User.objects.create_user(username="TestReader")
+        cls.old_post = Post.objects.create(
+            text="Старый пост", author=cls.author
+        )
+
+    def test_follow_backfills_and_unfollow_trims_feed(self):
+        """Подписка добавляет посты автора в ленту, отписка убирает."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=self.reader, post=self.old_post
+            ).exists()
+        )
+        follow.delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+
+    def test_new_post_fanned_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertIn(post, feed.feed_for(self.reader))
+        self.assertEqual(
+            FeedEntry.objects.get(user=self.reader, post=post).created,
+            post.created,
+        )
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_celebrity_posts_read_on_demand(self):
+        """Посты «знаменитостей» не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(
+            list(feed.feed_for(self.reader)), [post, self.old_post]
+        )
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_unfollow_below_limit_backfills_in_queue(self):
+        """Автор, переставший быть «знаменитостью», раскладывается по
+        лентам подписчиков в очереди задач, а до того его посты лента
+        добирает при чтении.
+        """
+        other = User.objects.create_user(username="Other")
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        posts = [
+            Post.objects.create(text=f"Пост {number}", author=self.author)
+            for number in range(3)
+        ]
+        self.assertFalse(FeedEntry.objects.filter(post__in=posts).exists())
+        Follow.objects.get(user=other).delete()
+        self.assertTrue(
+            Task.objects.filter(name="posts.feed.backfill_followers").exists()
+        )
+        # Задача еще не выполнена: посты не разложены, но видны
+        self.assertFalse(FeedEntry.objects.filter(post__in=posts).exists())
+        expected = [*reversed(posts), self.old_post]
+        self.assertEqual(list(feed.feed_for(self.reader)), expected)
+        feed.backfill_followers(self.author.pk)
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 4)
+        self.assertEqual(list(feed.feed_for(self.reader)), expected)
+        self.assertEqual(feed.celebrity_followees(self.reader).count(), 0)
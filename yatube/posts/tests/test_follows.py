@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from posts import follows
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.reader = User.objects.create_user(username="TestReader")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_follow_and_unfollow_once(self):
+        """Повторная подписка и отписка ничего не меняют."""
+        self.assertTrue(follows.follow(self.reader, self.author))
+        self.assertFalse(follows.follow(self.reader, self.author))
+        self.assertFalse(follows.follow(self.reader, self.reader))
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertTrue(follows.unfollow(self.reader, self.author))
+        self.assertFalse(follows.unfollow(self.reader, self.author))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_followees_cached(self):
+        """Проверка подписки после первой загрузки не ходит в базу."""
+        self.assertFalse(follows.is_following(self.reader, self.author.pk))
+        follows.follow(self.reader, self.author)
+        self.assertTrue(follows.is_following(self.reader, self.author.pk))
+        with self.assertNumQueries(0):
+            follows.is_following(self.reader, self.author.pk)
+        follows.unfollow(self.reader, self.author)
+        self.assertFalse(follows.is_following(self.reader, self.author.pk))
+
+    def test_profile_shows_follow_state(self):
+        """Профиль показывает подписку из кеша подписок."""
+        self.client.force_login(self.reader)
+        self.client.get(
+            reverse("posts:profile_follow", kwargs={"username": "TestAuthor"})
+        )
+        response = self.client.get(
+            reverse("posts:profile", kwargs={"username": "TestAuthor"})
+        )
+        self.assertTrue(response.context["following"])
+
+
+class FollowButtonsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.other = User.objects.create_user(username="TestOther")
+        cls.reader = User.objects.create_user(username="TestReader")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for author in (cls.author, cls.other):
+            for i in range(3):
+                Post.objects.create(text=f"Текст {i}", author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_buttons_follow_viewer_state(self):
+        """Кнопки подписки в ленте соответствуют подпискам зрителя."""
+        response = self.client.get(reverse("posts:index"))
+        self.assertEqual(response.context["followed"], {self.author.pk})
+        self.assertContains(
+            response,
+            reverse("posts:profile_unfollow", args=["TestAuthor"]),
+            count=3,
+        )
+        self.assertContains(
+            response,
+            reverse("posts:profile_follow", args=["TestOther"]),
+            count=3,
+        )
+
+    def test_follow_changes_feed_etag(self):
+        """Подписка меняет ETag лент зрителя."""
+        url = reverse("posts:index")
+        etag = self.client.get(url)["ETag"]
+        follows.follow(self.reader, self.other)
+        self.assertNotEqual(self.client.get(url)["ETag"], etag)
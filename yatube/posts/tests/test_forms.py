@@ -1,11 +1,16 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import RequestDataTooBig
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
+from posts.forms import PostForm
+from posts.images import SizeLimitUploadHandler
 from posts.models import Comment, Group, Post
 
 User = get_user_model()
@@ -127,3 +132,87 @@ class PostFormsTest(TestCase):
             reverse("posts:post_detail", kwargs={"post_id": 1}),
         )
         self.assertEqual(Comment.objects.count(), comments_count + 1)
+
+
+class PostImageTest(TestCase):
+    def upload(self, name, size, mode="RGB", image_format="JPEG", **save):
+        buffer = BytesIO()
+        Image.new(mode, size).save(buffer, image_format, **save)
+        return SimpleUploadedFile(name=name, content=buffer.getvalue())
+
+    def clean(self, upload):
+        form = PostForm(data={"text": "Текст"}, files={"image": upload})
+        return form, form.is_valid()
+
+    def test_photo_reencoded_without_exif(self):
+        """Фото поворачивается по EXIF и пересохраняется без метаданных."""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: повернуть на 90°
+        exif[0x010F] = "Camera"
+        form, valid = self.clean(
+            self.upload("photo.jpeg", (300, 200), exif=exif.tobytes())
+        )
+        self.assertTrue(valid)
+        image = form.cleaned_data["image"]
+        self.assertEqual(image.name, "photo.jpg")
+        saved = Image.open(image)
+        self.assertEqual(saved.size, (200, 300))
+        self.assertEqual(len(saved.getexif()), 0)
+
+    @override_settings(POST_IMAGE_MAX_WIDTH=100)
+    def test_wide_image_downscaled(self):
+        """Широкая картинка уменьшается до POST_IMAGE_MAX_WIDTH."""
+        form, valid = self.clean(
+            self.upload("wide.png", (400, 100), image_format="PNG")
+        )
+        self.assertTrue(valid)
+        saved = Image.open(form.cleaned_data["image"])
+        self.assertEqual((saved.format, saved.size), ("JPEG", (100, 25)))
+
+    def test_transparent_image_stays_png(self):
+        """Прозрачная картинка остается PNG."""
+        form, valid = self.clean(
+            self.upload("logo.png", (10, 10), "RGBA", "PNG")
+        )
+        self.assertTrue(valid)
+        self.assertEqual(form.cleaned_data["image"].name, "logo.png")
+
+    @override_settings(POST_IMAGE_MAX_SIZE=10)
+    def test_oversized_file_rejected(self):
+        """Файл больше POST_IMAGE_MAX_SIZE отклоняется."""
+        form, valid = self.clean(
+            self.upload("big.png", (100, 100), "L", "PNG")
+        )
+        self.assertFalse(valid)
+        self.assertIn("image", form.errors)
+
+    @override_settings(POST_IMAGE_MAX_SIZE=100)
+    def test_oversized_upload_aborted(self):
+        """Прием файла больше POST_IMAGE_MAX_SIZE обрывается с 400, а
+        запрос с большим Content-Length - еще до чтения тела.
+        """
+        author = User.objects.create_user(username="TestAuthor")
+        client = Client()
+        client.force_login(author)
+        response = client.post(
+            reverse("posts:post_create"),
+            {
+                "text": "Текст",
+                "image": SimpleUploadedFile("big.gif", b"GIF89a" * 100),
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Post.objects.exists())
+        handler = SizeLimitUploadHandler()
+        with self.assertRaises(RequestDataTooBig):
+            handler.handle_raw_input(
+                None, {}, settings.DATA_UPLOAD_MAX_MEMORY_SIZE + 101, b"x"
+            )
+        handler.handle_raw_input(None, {}, 101, b"x")
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_huge_resolution_rejected(self):
+        """Картинка больше POST_IMAGE_MAX_PIXELS отклоняется."""
+        form, valid = self.clean(self.upload("huge.jpg", (20, 20)))
+        self.assertFalse(valid)
+        self.assertIn("image", form.errors)
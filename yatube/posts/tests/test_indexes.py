@@ -0,0 +1,108 @@
+from core.paginators import CursorPaginator
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from posts import feed
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class IndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.reader = User.objects.create_user(username="TestReader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="test_slug", description="Описание"
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(5):
+            Post.objects.create(
+                text=f"Пост {number}", author=cls.author, group=cls.group
+            )
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return " / ".join(row[-1] for row in cursor.fetchall())
+
+    def test_feed_pages_read_from_index(self):
+        """Страницы лент (первая, следующая, предыдущая) читаются по
+        индексу, без сортировки во временном B-дереве.
+        """
+        feeds = {
+            "index": Post.objects.for_feed(),
+            "group": self.group.posts.for_feed(),
+            "profile": self.author.posts.for_feed(),
+            "follow": feed.feed_for(self.reader).for_feed(),
+        }
+        for name, post_list in feeds.items():
+            first = CursorPaginator(post_list, 2)
+            first.get_page(None)
+            second = CursorPaginator(post_list, 2)
+            second.get_page(first.next_cursor)
+            for cursor in (None, first.next_cursor, second.previous_cursor):
+                queryset = first.page_queryset(cursor)[0]
+                with self.subTest(feed=name, cursor=cursor):
+                    self.assertNotIn("TEMP B-TREE", self.plan(queryset))
+
+    def test_related_lists_read_from_index(self):
+        """Комментарии поста и подписчики автора читаются по индексу."""
+        post = Post.objects.first()
+        self.assertIn(
+            "comment_post_created_idx", self.plan(post.comments.all())
+        )
+        followers = Follow.objects.filter(author=self.author).values("user")
+        self.assertIn("follow_author_user_idx", self.plan(followers))
+
+    def test_follow_feed_pages(self):
+        """Лента подписок листается курсором по записям FeedEntry."""
+        post_list = feed.feed_for(self.reader)
+        first = CursorPaginator(post_list, 2)
+        first_page = first.get_page(None)
+        second = CursorPaginator(post_list, 2)
+        second_page = second.get_page(first.next_cursor)
+        self.assertEqual(
+            [post.text for post in first_page]
+            + [post.text for post in second_page],
+            ["Пост 4", "Пост 3", "Пост 2", "Пост 1"],
+        )
+        back = CursorPaginator(post_list, 2).get_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first_page))
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_celebrity_feed_pages_read_from_index(self):
+        """Лента с «знаменитостями» сливает части по индексам, без
+        сортировки и без повторов уже разложенных постов.
+        """
+        celebrity = User.objects.create_user(username="Celebrity")
+        Follow.objects.create(user=self.reader, author=celebrity)
+        for number in range(3):
+            Post.objects.create(
+                text=f"Знаменитость {number}", author=celebrity
+            )
+        post_list = feed.feed_for(self.reader).for_feed()
+        texts = []
+        cursor = None
+        while True:
+            paginator = CursorPaginator(post_list, 3)
+            queryset = paginator.page_queryset(cursor)[0]
+            with self.subTest(cursor=cursor):
+                plan = self.plan(queryset)
+                self.assertIn("MERGE", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+            texts += [post.text for post in paginator.get_page(cursor)]
+            cursor = paginator.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(len(texts), 8)
+        self.assertEqual(texts[:3], [f"Знаменитость {n}" for n in (2, 1, 0)])
+        back = CursorPaginator(post_list, 3)
+        self.assertEqual(
+            [post.text for post in back.iter_page(paginator.previous_cursor)],
+            texts[3:6],
+        )
+        self.assertIsNotNone(back.previous_cursor)
@@ -0,0 +1,107 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import search
+from posts.models import Comment, Post, SearchEntry
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.cats = Post.objects.create(
+            text="Красивые кошки гуляли по крышам", author=cls.author
+        )
+        cls.dogs = Post.objects.create(
+            text="Собака лаяла на кошку", author=cls.author
+        )
+        cls.other = Post.objects.create(
+            text="Пост про погоду", author=cls.author
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_stem(self):
+        """Разные формы слова приводятся к одной основе."""
+        self.assertEqual(search.terms("Кошки кошку КОШКА"), ["кошк"] * 3)
+        self.assertEqual(
+            search.terms("красивая, красивые и ёлки"), ["красив"] * 2 + ["елк"]
+        )
+
+    def test_ranked_results(self):
+        """Поиск находит словоформы и ранжирует по релевантности."""
+        self.assertEqual(
+            list(search.search("кошками на крыше")), [self.cats, self.dogs]
+        )
+        self.assertFalse(search.search("и на по").exists())
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении поста и комментариев."""
+        comment = Comment.objects.create(
+            text="Погода отличная", author=self.author, post=self.dogs
+        )
+        self.assertEqual(
+            list(search.search("погодой")), [self.other, self.dogs]
+        )
+        comment.delete()
+        self.assertEqual(list(search.search("погодой")), [self.other])
+        post = Post.objects.get(pk=self.other.pk)
+        post.text = "Пост про дождь"
+        post.save()
+        self.assertFalse(search.search("погодой").exists())
+        Comment.objects.create(
+            text="Погода отличная", author=self.author, post=self.dogs
+        )
+        Post.objects.filter(pk=self.dogs.pk).delete()
+        self.assertFalse(SearchEntry.objects.filter(post=self.dogs).exists())
+
+    def test_search_page_and_api(self):
+        """Страница и API поиска возвращают найденные посты."""
+        response = self.client.get(reverse("posts:search"), {"q": "кошка"})
+        self.assertEqual(
+            list(response.context["page_obj"]), [self.dogs, self.cats]
+        )
+        response = self.client.get(reverse("posts:api_search"), {"q": "крыши"})
+        data = json.loads(response.content)
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["results"][0]["id"], self.cats.pk)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идет по индексу."""
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "собаки"}
+        )
+        self.assertEqual(list(response.context["cl"].queryset), [self.dogs])
+        # Порядок - по релевантности, а не по сортировке админки
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "кошками на крыше"}
+        )
+        self.assertEqual(
+            list(response.context["cl"].result_list), [self.cats, self.dogs]
+        )
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "и на по"}
+        )
+        self.assertEqual(list(response.context["cl"].result_list), [])
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        SearchEntry.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Проиндексировано постов: 3", out.getvalue())
+        self.assertEqual(list(search.search("собаки")), [self.dogs])
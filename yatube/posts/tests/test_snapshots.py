@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from core import snapshots as store
+from core.models import Task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils.http import http_date
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+TEMP_SNAPSHOT_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def scheduled():
+    """Адреса последней поставленной перерисовки снимков."""
+    task = Task.objects.filter(name="core.snapshots.regenerate").last()
+    return set(json.loads(task.payload)["args"][0])
+
+
+@override_settings(SNAPSHOT_ROOT=TEMP_SNAPSHOT_ROOT)
+class SnapshotTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestAuthor")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая группа", slug="other", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            text="Текст поста", author=cls.author, group=cls.group
+        )
+        cls.urls = [
+            reverse("posts:index"),
+            reverse("posts:group_list", args=[cls.group.slug]),
+            reverse("posts:profile", args=[cls.author.username]),
+            reverse("posts:post_detail", args=[cls.post.pk]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_SNAPSHOT_ROOT, ignore_errors=True)
+
+    def test_build_matches_live_pages(self):
+        """Снимки совпадают с тем, что видит анонимный посетитель."""
+        live = {url: self.client.get(url).content for url in self.urls}
+        out = StringIO()
+        call_command("build_snapshots", stdout=out)
+        self.assertIn("Записано снимков: 5", out.getvalue())
+        for url in self.urls:
+            with self.subTest(url=url):
+                with open(store.file_path(url), "rb") as file:
+                    self.assertEqual(file.read(), live[url])
+
+    def test_middleware_serves_anonymous(self):
+        """Снимок получают только анонимные GET без параметров."""
+        url = reverse("posts:index")
+        store.write(url, b"snapshot")
+        response = self.client.get(url)
+        self.assertEqual(b"".join(response.streaming_content), b"snapshot")
+        self.assertEqual(response["Content-Type"], "text/html; charset=utf-8")
+        cached = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(cached.status_code, 304)
+        self.assertContains(self.client.get(url, {"cursor": "x"}), "Текст")
+        user = Client()
+        user.force_login(self.author)
+        self.assertContains(user.get(url), "Текст поста")
+
+    def test_snapshot_cache_headers(self):
+        """Снимок зависит от cookie и сверяется при каждом переходе."""
+        url = reverse("posts:index")
+        store.write(url, b"snapshot")
+        for response in (
+            self.client.get(url),
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date()),
+        ):
+            with self.subTest(status=response.status_code):
+                self.assertIn("Cookie", response["Vary"])
+                self.assertEqual(response["Cache-Control"], "no-cache")
+
+    def test_post_change_scope(self):
+        """Новый пост перерисовывает ленты, в которых он виден."""
+        post = Post.objects.create(
+            text="Новый", author=self.author, group=self.other_group
+        )
+        self.assertEqual(
+            scheduled(),
+            {
+                "/",
+                "/group/other/",
+                "/profile/TestAuthor/",
+                f"/posts/{post.pk}/",
+            },
+        )
+        # Страницы прежних постов автора не перерисовываются и даже не
+        # проверяются: число его постов на них обновит пересборка
+        store.write(f"/posts/{self.post.pk}/", b"snapshot")
+        with mock.patch.object(store, "exists") as exists:
+            post.delete()
+        exists.assert_not_called()
+        self.assertNotIn(f"/posts/{self.post.pk}/", scheduled())
+
+    def test_comment_and_group_scope(self):
+        """Комментарий меняет только страницу поста, группа - свои
+        страницы и уже снятые страницы с ее постами.
+        """
+        Comment.objects.create(
+            post=self.post, author=self.author, text="Комментарий"
+        )
+        self.assertEqual(scheduled(), {f"/posts/{self.post.pk}/"})
+        store.write("/profile/TestAuthor/", b"snapshot")
+        self.group.slug = "renamed"
+        self.group.save()
+        self.assertEqual(
+            scheduled(),
+            {"/", "/group/group/", "/group/renamed/", "/profile/TestAuthor/"},
+        )
+
+    @override_settings(SNAPSHOT_ROOT=None)
+    def test_disabled(self):
+        """Без SNAPSHOT_ROOT изменения не ставят задач."""
+        count = Task.objects.count()
+        Post.objects.create(text="Новый", author=self.author)
+        self.assertEqual(Task.objects.count(), count)
+
+
+@override_settings(SNAPSHOT_ROOT=TEMP_SNAPSHOT_ROOT, TASKS_ALWAYS_EAGER=True)
+class SnapshotRegenerationTest(TransactionTestCase):
+    def tearDown(self):
+        shutil.rmtree(TEMP_SNAPSHOT_ROOT, ignore_errors=True)
+
+    def test_snapshots_follow_changes(self):
+        """После коммита снимки перерисовываются и удаляются."""
+        cache.clear()
+        author = User.objects.create_user(username="TestAuthor")
+        post = Post.objects.create(text="Первый пост", author=author)
+        detail = store.file_path(f"/posts/{post.pk}/")
+        with open(store.file_path("/"), encoding="utf-8") as file:
+            self.assertIn("Первый пост", file.read())
+        self.assertTrue(os.path.exists(detail))
+        post.delete()
+        self.assertFalse(os.path.exists(detail))
+        with open(store.file_path("/"), encoding="utf-8") as file:
+            self.assertNotIn("Первый пост", file.read())
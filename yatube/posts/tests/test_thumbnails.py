@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from core.models import Task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PregenerateThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="TestAuthor")
+        small_gif = (
+            b"\x47\x49\x46\x38\x39\x61\x02\x00"
+            b"\x01\x00\x80\x00\x00\x00\x00\x00"
+            b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+            b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+            b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+            b"\x0A\x00\x3B"
+        )
+        cls.post = Post.objects.create(
+            text="Пост с картинкой",
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name="small.gif", content=small_gif, content_type="image/gif"
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_command_pregenerates_all_geometries(self):
+        """Команда нарезает миниатюры всех размеров из шаблонов."""
+        out = StringIO()
+        call_command("pregenerate_thumbnails", workers=1, stdout=out)
+        self.assertIn("Обработано картинок: 1, с ошибками: 0", out.getvalue())
+        thumbnails = [
+            name
+            for _, _, files in os.walk(os.path.join(TEMP_MEDIA_ROOT, "cache"))
+            for name in files
+        ]
+        self.assertEqual(len(thumbnails), 6)
+
+    def test_post_save_enqueues_thumbnails_once(self):
+        """Сохранение поста ставит нарезку в очередь один раз."""
+        self.post.text = "Новый текст"
+        self.post.save()
+        self.assertEqual(
+            Task.objects.filter(
+                key=f"thumbnails:{self.post.image.name}"
+            ).count(),
+            1,
+        )
+
+    def test_responsive_thumbnail_srcset(self):
+        """Тег выводит srcset из всех ширин размера."""
+        html = Template(
+            "{% load post_images %}"
+            '{% responsive_thumbnail post.image "1000x500" %}'
+        ).render(Context({"post": self.post}))
+        self.assertIn("480w", html)
+        self.assertIn("768w", html)
+        self.assertIn("1000w", html)
+        self.assertIn('sizes="(max-width: 1000px) 100vw, 1000px"', html)
@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from posts import transfer
+from posts.models import AuthorStats, Comment, FeedEntry, Follow, Group, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TransferTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.dump = os.path.join(self.directory, "dump.ndjson.gz")
+        self.media = os.path.join(self.directory, "media")
+        self.author = User.objects.create_user(username="TestAuthor")
+        self.reader = User.objects.create_user(username="TestReader")
+        group = Group.objects.create(
+            title="Группа", slug="test_slug", description="Описание"
+        )
+        self.post = Post.objects.create(
+            text="Пост с картинкой",
+            author=self.author,
+            group=group,
+            image=SimpleUploadedFile(
+                name="small.gif", content=b"GIF89a", content_type="image/gif"
+            ),
+        )
+        Post.objects.bulk_create(
+            [Post(text=f"Пост {i}", author=self.author) for i in range(4)]
+        )
+        Comment.objects.create(
+            text="Комментарий", author=self.reader, post=self.post
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_export_import_round_trip(self):
+        """Дамп загружается обратно с теми же данными и картинками."""
+        created = Post.objects.get(pk=self.post.pk).created
+        call_command(
+            "yatube_export", self.dump, media_dir=self.media, stdout=StringIO()
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.media, self.post.image.name))
+        )
+        os.remove(os.path.join(TEMP_MEDIA_ROOT, self.post.image.name))
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        out = StringIO()
+        call_command(
+            "yatube_import",
+            self.dump,
+            media_dir=self.media,
+            chunk_size=3,
+            batch_size=2,
+            stdout=out,
+        )
+        self.assertIn("posts.post: 5", out.getvalue())
+        self.assertIn("Скопировано картинок: 1", out.getvalue())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.created, created)
+        self.assertEqual(post.comments_count, 1)
+        self.assertTrue(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, post.image.name))
+        )
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 5
+        )
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 5)
+        # Записи с занятыми pk не пропускаются молча
+        with self.assertRaises(CommandError):
+            call_command("yatube_import", self.dump, stdout=StringIO())
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 5)
+
+    def test_existing_follow_skipped(self):
+        """Уже существующая подписка с другим pk пропускается и
+        попадает в отчет.
+        """
+        records = [
+            {
+                "model": "posts.follow",
+                "pk": 100 + number,
+                "fields": {"user": user.pk, "author": author.pk},
+            }
+            for number, (user, author) in enumerate(
+                [(self.reader, self.author), (self.author, self.reader)]
+            )
+        ]
+        out = StringIO()
+        transfer.load(
+            StringIO("\n".join(json.dumps(record) for record in records)),
+            log=lambda message: out.write(message + "\n"),
+            rebuild=False,
+        )
+        self.assertIn("posts.follow: 1", out.getvalue())
+        self.assertIn(
+            "Пропущено подписок, которые уже есть: 1", out.getvalue()
+        )
+        self.assertTrue(
+            Follow.objects.filter(
+                pk=101, user=self.author, author=self.reader
+            ).exists()
+        )
+        self.assertEqual(Follow.objects.count(), 2)
@@ -6,8 +6,11 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from posts import follows, views
 from posts.models import Comment, Follow, Group, Post
 
 User = get_user_model()
@@ -132,15 +135,15 @@ class PostViewTest(TestCase):
             "posts:profile": {"username": "TestAuthor"},
         }
         user = self.authorized_client
-        paginator_test_addr = "?page=2"
         for url, kwargs in urls.items():
             with self.subTest(url=url):
-                response = user.get(
-                    reverse(url, kwargs=kwargs) + paginator_test_addr
-                )
-                self.assertEqual(len(response.context["page_obj"]), 6)
                 response = user.get(reverse(url, kwargs=kwargs))
                 self.assertEqual(len(response.context["page_obj"]), 10)
+                cursor = response.context["page_obj"].paginator.next_cursor
+                response_next = user.get(
+                    reverse(url, kwargs=kwargs), {"cursor": cursor}
+                )
+                self.assertEqual(len(response_next.context["page_obj"]), 6)
                 first_object = response.context["page_obj"][0]
                 objects = {
                     first_object.text: "Пост с картинкой",
@@ -152,6 +155,32 @@ class PostViewTest(TestCase):
                     with self.subTest(object=object):
                         self.assertEqual(object, expected)
 
+    def test_cursor_paginator_navigation(self):
+        """Курсоры ведут на соседние страницы без запроса COUNT."""
+        url = reverse("posts:group_list", kwargs={"slug": "test_slug"})
+        first_page = self.authorized_client.get(url).context["page_obj"]
+        self.assertTrue(first_page.has_next())
+        self.assertFalse(first_page.has_previous())
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(
+                url, {"cursor": first_page.paginator.next_cursor}
+            )
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+        second_page = response.context["page_obj"]
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(second_page.has_previous())
+        self.assertTrue(
+            set(first_page.object_list).isdisjoint(second_page.object_list)
+        )
+        response = self.authorized_client.get(
+            url, {"cursor": second_page.paginator.previous_cursor}
+        )
+        self.assertEqual(list(response.context["page_obj"]), list(first_page))
+        response = self.authorized_client.get(url, {"cursor": "мусор"})
+        self.assertEqual(list(response.context["page_obj"]), list(first_page))
+
     def test_post_detail_pages_show_correct_context(self):
         """Проверка отображения созданного поста на нужных страницах."""
         user = self.authorized_client
@@ -190,23 +219,34 @@ class PostViewTest(TestCase):
         self.assertIn(self.comment, response.context.get("comments"))
 
     def test_cache_index_page_correct(self):
-        """Шаблон index кешируется."""
+        """Карточки постов на index кешируются и сбрасываются сигналами."""
         self.post_cache = Post.objects.create(
             text="Пост для проверки кеша",
             author=self.user,
         )
         response = self.authorized_client.get(reverse("posts:index"))
         self.assertIn(self.post_cache, response.context["page_obj"])
-        Post.objects.filter(id=self.post_cache.id).delete()
-        response_after_del = self.authorized_client.get(reverse("posts:index"))
-        self.assertEqual(response.content, response_after_del.content)
-        cache.clear()
-        response_after_clear = self.authorized_client.get(
-            reverse("posts:index")
-        )
-        self.assertNotEqual(
-            response_after_clear.content, response_after_del.content
+        Post.objects.filter(id=self.post_cache.id).update(
+            text="Изменен в обход сигналов"
         )
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertContains(response, "Пост для проверки кеша")
+        self.post_cache.text = "Отредактированный пост"
+        self.post_cache.save()
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertContains(response, "Отредактированный пост")
+        self.post_cache.delete()
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertNotContains(response, "Отредактированный пост")
+
+    def test_cached_cards_follow_author_changes(self):
+        """Изменение имени автора сбрасывает его карточки."""
+        self.authorized_client.get(reverse("posts:index"))
+        self.user.first_name = "Новое"
+        self.user.last_name = "Имя"
+        self.user.save()
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertContains(response, "Новое Имя")
 
     def test_follow_unfollow(self):
         """Проверка возможности подписки/отписки."""
@@ -241,3 +281,106 @@ class PostViewTest(TestCase):
         self.assertIn(self.post_follow_check, response.context["page_obj"])
         response = self.authorized_client.get(reverse("posts:follow_index"))
         self.assertNotIn(self.post_follow_check, response.context["page_obj"])
+
+
+class PostListQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username="TestAuthor", first_name="Имя", last_name="Фамилия"
+        )
+        cls.reader = User.objects.create_user(username="TestReader")
+        cls.group = Group.objects.create(
+            title="Тестовый заголовок группы",
+            slug="test_slug",
+            description="Тестовое описание группы",
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(15):
+            Post.objects.create(
+                text=f"Текст {i}", author=cls.user, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        # Подписки зрителя читаются из кеша, а не на каждой странице
+        follows.followees(self.reader.pk)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_list_pages_query_count(self):
+        """Число запросов страницы ленты не зависит от числа постов."""
+        # Публичные ленты читают еще и метку изменения для ETag
+        pages = {
+            reverse("posts:index"): 4,
+            reverse("posts:group_list", kwargs={"slug": "test_slug"}): 5,
+            reverse("posts:profile", kwargs={"username": "TestAuthor"}): 5,
+            reverse("posts:follow_index"): 4,
+        }
+        for url, queries in pages.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = self.authorized_client.get(url)
+                self.assertEqual(len(response.context["page_obj"]), 10)
+                self.assertContains(response, "Имя Фамилия")
+
+
+class CommentThreadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="TestAuthor")
+        cls.post = Post.objects.create(text="Популярный пост", author=cls.user)
+        cls.quiet_post = Post.objects.create(
+            text="Тихий пост", author=cls.user
+        )
+        Comment.objects.bulk_create(
+            Comment(text=f"Комментарий {i}", author=cls.user, post=cls.post)
+            for i in range(45)
+        )
+        Comment.objects.create(
+            text="Единственный", author=cls.user, post=cls.quiet_post
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_detail_query_count_bounded(self):
+        """Число запросов поста не зависит от числа комментариев."""
+        queries = []
+        for post in (self.quiet_post, self.post):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.authorized_client.get(
+                    reverse("posts:post_detail", args=[post.pk])
+                )
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+        comments = response.context["comments"]
+        self.assertEqual(len(comments), views.COMMENTS_PER_PAGE)
+        self.assertContains(response, "Показать еще")
+
+    def test_fragment_pages(self):
+        """Фрагмент отдает следующие страницы комментариев без повторов."""
+        url = reverse("posts:post_detail", args=[self.post.pk])
+        comments = self.authorized_client.get(url).context["comments"]
+        texts = [comment.text for comment in comments]
+        while comments.has_next():
+            response = self.authorized_client.get(
+                reverse("posts:post_comments", args=[self.post.pk]),
+                {"cursor": comments.paginator.next_cursor},
+            )
+            self.assertNotContains(response, "<html")
+            comments = response.context["comments"]
+            texts += [comment.text for comment in comments]
+        self.assertEqual(len(texts), 45)
+        self.assertEqual(len(set(texts)), 45)
+        self.assertNotContains(response, "Показать еще")
+
+    def test_fragment_missing_post(self):
+        """Фрагмент комментариев несуществующего поста - 404."""
+        response = self.authorized_client.get(
+            reverse("posts:post_comments", args=[self.post.pk + 1000])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,67 @@
+"""Заблаговременная нарезка миниатюр картинок постов.
+
+Шаблоны лент вызывают {% thumbnail %}, который создает миниатюру при
+первом рендере страницы. Чтобы запрос не ждал Pillow, миниатюры всех
+размеров из шаблонов нарезает фоновая очередь (core.tasks) сразу после
+сохранения поста.
+"""
+import logging
+
+from core import tasks
+from django.db import connections
+from sorl.thumbnail import get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Размеры должны совпадать с тегами {% responsive_thumbnail %}
+# в templates/posts/
+THUMBNAIL_SIZES = ("1000x500", "1000x1000")
+THUMBNAIL_OPTIONS = {"crop": "center", "upscale": True}
+# Меньшие ширины для srcset; пропорции те же, что у размера из шаблона
+RESPONSIVE_WIDTHS = (480, 768)
+
+
+def variants(size):
+    """Ширины и геометрии srcset для размера size по возрастанию."""
+    width, height = map(int, size.split("x"))
+    return [
+        (variant, f"{variant}x{round(height * variant / width)}")
+        for variant in RESPONSIVE_WIDTHS
+        if variant < width
+    ] + [(width, size)]
+
+
+THUMBNAIL_GEOMETRIES = tuple(
+    geometry for size in THUMBNAIL_SIZES for _, geometry in variants(size)
+)
+
+
+@tasks.task()
+def generate(image_name):
+    """Нарезает все миниатюры картинки; ошибку повторит очередь."""
+    for geometry in THUMBNAIL_GEOMETRIES:
+        get_thumbnail(image_name, geometry, **THUMBNAIL_OPTIONS)
+
+
+def pregenerate(image_name):
+    """Нарезает все миниатюры картинки; возвращает успешность."""
+    try:
+        generate(image_name)
+    except Exception:
+        logger.exception("Не удалось нарезать миниатюры %s", image_name)
+        return False
+    return True
+
+
+def pregenerate_in_worker(image_name):
+    try:
+        return pregenerate(image_name)
+    finally:
+        # Поток пула открывает свои соединения с базой
+        # (хранилище ключей sorl) - закрываем их после задачи.
+        connections.close_all()
+
+
+def schedule(image_name):
+    """Ставит нарезку в очередь; картинка нарезается один раз."""
+    generate.enqueue(image_name, key=f"thumbnails:{image_name}")
@@ -0,0 +1,294 @@
+"""Потоковые выгрузка и загрузка данных в формате NDJSON.
+
+Каждая строка файла - одна запись в формате dumpdata:
+{"model": "posts.post", "pk": 1, "fields": {...}}. Модели выгружаются
+в порядке зависимостей, поэтому при загрузке ссылки указывают на уже
+вставленные строки. Ни выгрузка, ни загрузка не держат в памяти больше
+одной пачки записей, так что размер файла не ограничен памятью.
+Картинки постов копируются параллельно после каждой пачки.
+"""
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from posts import counters, feed, search, stamps
+from posts.models import Follow
+
+# Порядок важен: сначала те, на кого ссылаются
+MODELS = (
+    "auth.user",
+    "posts.group",
+    "posts.post",
+    "posts.comment",
+    "posts.follow",
+)
+
+
+class DumpEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder обрезает время до миллисекунд, а курсоры
+        # лент сравнивают created с точностью до микросекунд
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def open_dump(path, mode):
+    """Файл дампа; .gz сжимается на лету, "-" - stdin/stdout."""
+    if path == "-":
+        return sys.stdin if mode == "r" else sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _fields(label):
+    model = apps.get_model(label)
+    return model, [
+        field for field in model._meta.concrete_fields if not field.primary_key
+    ]
+
+
+class Progress:
+    """Печатает число обработанных записей и скорость."""
+
+    def __init__(self, log, every=10000):
+        self.log = log
+        self.every = every
+        self.started = time.monotonic()
+        self.counts = {}
+        self.total = 0
+
+    def add(self, label, count=1):
+        self.counts[label] = self.counts.get(label, 0) + count
+        before = self.total
+        self.total += count
+        if before // self.every != self.total // self.every:
+            self.log(f"{self.total} записей, {self.rate():.0f} записей/с")
+
+    def rate(self):
+        return self.total / max(time.monotonic() - self.started, 1e-6)
+
+    def report(self):
+        for label, count in self.counts.items():
+            self.log(f"{label}: {count}")
+        elapsed = time.monotonic() - self.started
+        self.log(
+            f"Всего {self.total} записей за {elapsed:.1f} с "
+            f"({self.rate():.0f} записей/с)"
+        )
+
+
+def export(stream, log=print, chunk_size=2000, media_dir=None, workers=4):
+    """Пишет все записи в поток; картинки постов копирует в media_dir."""
+    progress = Progress(log)
+    images = []
+    copied = 0
+    for label in MODELS:
+        model, fields = _fields(label)
+        names = [field.attname for field in fields]
+        rows = model._base_manager.order_by("pk").values_list("pk", *names)
+        for pk, *values in rows.iterator(chunk_size=chunk_size):
+            record = {
+                "model": label,
+                "pk": pk,
+                "fields": {
+                    field.name: value for field, value in zip(fields, values)
+                },
+            }
+            stream.write(
+                json.dumps(record, cls=DumpEncoder, ensure_ascii=False) + "\n"
+            )
+            if (
+                label == "posts.post"
+                and media_dir
+                and record["fields"]["image"]
+            ):
+                images.append(record["fields"]["image"])
+                if len(images) >= chunk_size:
+                    copied += copy_media(
+                        images, settings.MEDIA_ROOT, media_dir, workers
+                    )
+                    images = []
+            progress.add(label)
+    progress.report()
+    if media_dir:
+        copied += copy_media(images, settings.MEDIA_ROOT, media_dir, workers)
+        log(f"Скопировано картинок: {copied}")
+
+
+def _copy(source, target):
+    """Копирует файл, если его еще нет; возвращает, скопирован ли он."""
+    if os.path.exists(target):
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(source, target)
+    return True
+
+
+def copy_media(names, source_dir, target_dir, workers=4):
+    """Параллельно копирует картинки; возвращает число новых файлов."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(
+            executor.map(
+                lambda name: _copy(
+                    os.path.join(source_dir, name),
+                    os.path.join(target_dir, name),
+                ),
+                names,
+            )
+        )
+
+
+def _defer_constraints(cursor):
+    """Откладывает проверку внешних ключей до конца транзакции."""
+    if connection.vendor == "sqlite":
+        cursor.execute("PRAGMA defer_foreign_keys = ON")
+    elif connection.vendor == "postgresql":
+        cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+
+
+def _insert(model, fields, objs):
+    """Пачка INSERT, как в bulk_create, но в режиме raw: значения полей,
+    включая auto_now_add (created), записываются как есть.
+    """
+    fields = [model._meta.pk] + fields
+    batch = connection.ops.bulk_batch_size(fields, objs) or len(objs)
+    for start in range(0, len(objs), batch):
+        end = start + batch
+        model._base_manager._insert(objs[start:end], fields=fields, raw=True)
+
+
+def _new_follows(objs):
+    """Подписки без тех, чья пара (unique_follow) уже есть в базе."""
+    existing = set(
+        Follow.objects.filter(
+            user_id__in={obj.user_id for obj in objs},
+            author_id__in={obj.author_id for obj in objs},
+        ).values_list("user_id", "author_id")
+    )
+    return [
+        obj for obj in objs if (obj.user_id, obj.author_id) not in existing
+    ]
+
+
+def _parse(line, specs):
+    record = json.loads(line)
+    label = record["model"]
+    if label not in specs:
+        raise ValueError(f"Неизвестная модель в дампе: {label}")
+    model, fields = specs[label]
+    values = record["fields"]
+    return label, model(
+        pk=record["pk"],
+        **{
+            field.attname: field.to_python(values[field.name])
+            for field in fields
+            if field.name in values
+        },
+    )
+
+
+def _read_chunk(lines, specs, chunk_size, media_dir):
+    """Следующие chunk_size записей по моделям и картинки постов."""
+    chunk = {}
+    images = []
+    for line in islice(lines, chunk_size):
+        label, obj = _parse(line, specs)
+        chunk.setdefault(label, []).append(obj)
+        if media_dir and label == "posts.post" and obj.image:
+            images.append(obj.image.name)
+    return chunk, images
+
+
+def _write_chunk(chunk, specs, batch_size, progress):
+    """Вставляет записи одной транзакцией; возвращает число пропущенных
+    подписок. Запись с уже занятым pk прерывает загрузку.
+    """
+    skipped = 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            _defer_constraints(cursor)
+        for label in MODELS:
+            objs = chunk.get(label, [])
+            model, fields = specs[label]
+            for start in range(0, len(objs), batch_size):
+                end = start + batch_size
+                batch = objs[start:end]
+                if model is Follow:
+                    # Та же подписка могла появиться с другим pk
+                    new = _new_follows(batch)
+                    skipped += len(batch) - len(new)
+                    batch = new
+                _insert(model, fields, batch)
+                progress.add(label, len(batch))
+    return skipped
+
+
+def _reset_sequences(models):
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def _rebuild(log, batch_size):
+    """Вставка шла в обход сигналов: счетчики, ленты и индекс
+    пересобираются целиком, ETag всех страниц меняется.
+    """
+    with transaction.atomic():
+        authors, posts, groups = counters.recount()
+        log(
+            f"Счетчики: авторы - {authors}, посты - {posts}, "
+            f"группы - {groups}"
+        )
+        log(f"Записи лент: {feed.rebuild()}")
+        log(f"Проиндексировано постов: {search.rebuild(batch_size)}")
+        stamps.touch_all()
+
+
+def load(
+    stream,
+    log=print,
+    batch_size=1000,
+    chunk_size=20000,
+    media_dir=None,
+    workers=4,
+    rebuild=True,
+):
+    """Загружает записи из потока: каждые chunk_size строк - отдельная
+    транзакция, внутри нее вставка пачками по batch_size.
+    """
+    progress = Progress(log)
+    specs = {label: _fields(label) for label in MODELS}
+    copied = 0
+    skipped = 0
+    lines = (line for line in stream if line.strip())
+    while True:
+        chunk, images = _read_chunk(lines, specs, chunk_size, media_dir)
+        if not chunk:
+            break
+        skipped += _write_chunk(chunk, specs, batch_size, progress)
+        if media_dir:
+            copied += copy_media(
+                images, media_dir, settings.MEDIA_ROOT, workers
+            )
+    _reset_sequences([specs[label][0] for label in MODELS])
+    progress.report()
+    if skipped:
+        log(f"Пропущено подписок, которые уже есть: {skipped}")
+    if media_dir:
+        log(f"Скопировано картинок: {copied}")
+    if rebuild:
+        _rebuild(log, batch_size)
@@ -6,14 +6,21 @@ app_name = "posts"
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("group/", views.group_index, name="group_index"),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
     path("profile/<str:username>/", views.profile, name="profile"),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
+    path(
+        "posts/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments",
+    ),
     path("create/", views.post_create, name="post_create"),
     path("posts/<int:post_id>/edit/", views.post_edit, name="post_edit"),
     path(
         "posts/<int:post_id>/comment/", views.add_comment, name="add_comment"
     ),
+    path("search/", views.post_search, name="search"),
     path("follow/", views.follow_index, name="follow_index"),
     path(
         "profile/<str:username>/follow/",
@@ -25,6 +32,13 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow",
     ),
-    #    path("api/v1/posts/", views.api_posts),
-    #    path("api/v1/posts/<int:pk>/", views.api_posts_detail),
+    path("api/v1/posts/", views.api_index, name="api_index"),
+    path("api/v1/group/<slug:slug>/", views.api_group, name="api_group"),
+    path(
+        "api/v1/profile/<str:username>/",
+        views.api_profile,
+        name="api_profile",
+    ),
+    path("api/v1/follow/", views.api_follow, name="api_follow"),
+    path("api/v1/search/", views.api_search, name="api_search"),
 ]
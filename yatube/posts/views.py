@@ -1,32 +1,33 @@
 import os
 
+from core.db import read_only
+from core.paginators import CursorPaginator
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.views.decorators.cache import cache_page
-from rest_framework import serializers, status
-from rest_framework.decorators import api_view
-from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
 
+from posts import api, counters, directory, feed, follows, search, stamps
 from posts.forms import CommentForm, PostForm
-from posts.models import Follow, Group, Post, User
-
-from .serializers import PostSerializer
+from posts.models import Comment, Group, Post, User
 
 NUMBERS_OF_LIMIT = 10
+COMMENTS_PER_PAGE = 20
 
 
 def paginator(request, post_list):
-    paginator = Paginator(post_list, NUMBERS_OF_LIMIT)
-    page_number = request.GET.get("page")
-    return paginator.get_page(page_number)
+    paginator = CursorPaginator(post_list, NUMBERS_OF_LIMIT)
+    return paginator.get_page(request.GET.get("cursor"))
 
 
-@cache_page(20, key_prefix="index_page")
+@read_only
+@stamps.page_condition(stamps.index_scopes)
 def index(request):
     template = "posts/index.html"
-    post_list = Post.objects.all()
+    post_list = Post.objects.for_feed()
     page_obj = paginator(request, post_list)
     context = {
         "page_obj": page_obj,
@@ -34,10 +35,21 @@ def index(request):
     return render(request, template, context)
 
 
+@read_only
+def group_index(request):
+    template = "posts/group_index.html"
+    context = {
+        "groups": directory.directory(),
+    }
+    return render(request, template, context)
+
+
+@read_only
+@stamps.page_condition(stamps.group_scopes)
 def group_posts(request, slug):
     template = "posts/group_list.html"
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.for_feed()
     page_obj = paginator(request, post_list)
     context = {
         "group": group,
@@ -46,32 +58,36 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@read_only
+@stamps.page_condition(stamps.profile_scopes)
 def profile(request, username):
     template = "posts/profile.html"
-    author = get_object_or_404(User, username=username)
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user, author=author
-        ).exists()
-    else:
-        following = False
-    post_list = author.posts.all()
-    count = post_list.count()
+    author = get_object_or_404(
+        User.objects.select_related("stats"), username=username
+    )
+    following = follows.is_following(request.user, author.pk)
+    stats = counters.author_stats(author)
+    post_list = author.posts.for_feed()
     page_obj = paginator(request, post_list)
     context = {
         "author": author,
         "page_obj": page_obj,
-        "count": count,
+        "count": stats.posts_count,
+        "stats": stats,
         "following": following,
     }
     return render(request, template, context)
 
 
+@read_only
+@stamps.page_condition(stamps.post_scopes)
 def post_detail(request, post_id):
     template = "posts/post_detail.html"
-    post = get_object_or_404(Post, id=post_id)
-    count = post.author.posts.count()
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related("author__stats", "group"), id=post_id
+    )
+    count = counters.author_stats(post.author).posts_count
+    comments = comments_page(request, post.pk)
     form = CommentForm(request.POST or None)
     context = {
         "post": post,
@@ -82,6 +98,45 @@ def post_detail(request, post_id):
     return render(request, template, context)
 
 
+def comments_page(request, post_id):
+    """Страница ветки комментариев по курсору ?cursor=."""
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).for_thread(),
+        COMMENTS_PER_PAGE,
+    )
+    return paginator.get_page(request.GET.get("cursor"))
+
+
+@read_only
+def post_comments(request, post_id):
+    """Следующие страницы комментариев - HTML-фрагментом для подгрузки."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404("Пост не найден")
+    template = "posts/includes/comment_list.html"
+    context = {
+        "post_id": post_id,
+        "comments": comments_page(request, post_id),
+    }
+    return render(request, template, context)
+
+
+@read_only
+def post_search(request):
+    template = "posts/search.html"
+    query = request.GET.get("q", "").strip()
+    # Результаты упорядочены по релевантности, поэтому страницы
+    # нумеруются, а не адресуются курсором
+    post_list = search.search(query, Post.objects.for_feed())
+    page_obj = Paginator(post_list, NUMBERS_OF_LIMIT).get_page(
+        request.GET.get("page")
+    )
+    context = {
+        "query": query,
+        "page_obj": page_obj,
+    }
+    return render(request, template, context)
+
+
 @login_required
 def post_create(request):
     template = "posts/create_post.html"
@@ -126,10 +181,11 @@ def add_comment(request, post_id):
     return redirect("posts:post_detail", post_id=post_id)
 
 
+@read_only
 @login_required
 def follow_index(request):
     template = "posts/follow.html"
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = feed.feed_for(request.user).for_feed()
     page_obj = paginator(request, post_list)
     context = {
         "page_obj": page_obj,
@@ -140,19 +196,50 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if (
-        request.user != author
-        and not Follow.objects.filter(
-            user=request.user, author=author
-        ).exists()
-    ):
-        Follow.objects.create(user=request.user, author=author)
+    follows.follow(request.user, author)
     return redirect(reverse("posts:profile", args=[username]))
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    if Follow.objects.filter(user=request.user, author=author).exists():
-        Follow.objects.filter(user=request.user, author=author).delete()
+    follows.unfollow(request.user, author)
     return redirect(reverse("posts:profile", args=[username]))
+
+
+@read_only
+@api_view(["GET"])
+@stamps.page_condition(stamps.index_scopes)
+def api_index(request):
+    return api.stream_posts(request, Post.objects.all())
+
+
+@read_only
+@api_view(["GET"])
+@stamps.page_condition(stamps.group_scopes)
+def api_group(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return api.stream_posts(request, group.posts.all())
+
+
+@read_only
+@api_view(["GET"])
+@stamps.page_condition(stamps.profile_scopes)
+def api_profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return api.stream_posts(request, author.posts.all())
+
+
+@read_only
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@stamps.page_condition(stamps.follow_scopes)
+def api_follow(request):
+    return api.stream_posts(request, feed.feed_for(request.user))
+
+
+@read_only
+@api_view(["GET"])
+def api_search(request):
+    post_list = search.search(request.GET.get("q", ""), Post.objects.all())
+    return api.numbered_posts(request, post_list)
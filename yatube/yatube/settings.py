@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+from urllib.parse import quote
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -44,21 +45,28 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.forms",
     "posts.apps.PostsConfig",
     "users.apps.UsersConfig",
     "core.apps.CoreConfig",
     "about.apps.AboutConfig",
+    "benchmarks.apps.BenchmarksConfig",
     "sorl.thumbnail",
     "debug_toolbar",
     "rest_framework",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.StaticFilesMiddleware",
+    "core.middleware.SnapshotMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.ReadOnlyMiddleware",
+    "core.middleware.RateLimitMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
@@ -71,12 +79,25 @@ INTERNAL_IPS = [
 ROOT_URLCONF = "yatube.urls"
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+# Шаблоны разбираются один раз на процесс (cached.Loader), в том числе
+# при DEBUG. Чтобы dev-сервер видел правки шаблонов без перезапуска,
+# выставьте TEMPLATE_CACHE = False.
+TEMPLATE_CACHE = True
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates, измеряющий время рендера для метрик
+        "BACKEND": "core.backends.TimedDjangoTemplates",
         "DIRS": [TEMPLATES_DIR],
-        "APP_DIRS": True,
         "OPTIONS": {
+            "loaders": (
+                [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)]
+                if TEMPLATE_CACHE
+                else TEMPLATE_LOADERS
+            ),
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -87,6 +108,19 @@ TEMPLATES = [
         },
     },
 ]
+# Шаблоны, которые компилируются при запуске процесса (core.apps):
+# первые запросы не ждут их разбора
+TEMPLATE_PRELOAD = [
+    "base.html",
+    "includes/header.html",
+    "includes/footer.html",
+    "posts/includes/paginator.html",
+]
+# Виджеты форм рендерятся движком из TEMPLATES с тем же кешем шаблонов
+FORM_RENDERER = "django.forms.renderers.TemplatesSetting"
+# debug_toolbar ищет APP_DIRS, а шаблоны приложений загружает
+# app_directories.Loader внутри кешированного загрузчика
+SILENCED_SYSTEM_CHECKS = ["debug_toolbar.W006"]
 
 WSGI_APPLICATION = "yatube.wsgi.application"
 
@@ -94,11 +128,39 @@ WSGI_APPLICATION = "yatube.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Нагрузочные тесты заполняют отдельную базу, путь к ней - в переменной
+# окружения YATUBE_DATABASE
+DEFAULT_DATABASE_PATH = os.path.join(BASE_DIR, "db.sqlite3")
+DATABASE_PATH = os.environ.get("YATUBE_DATABASE", DEFAULT_DATABASE_PATH)
+
+# Соединения живут между запросами (CONN_MAX_AGE). Реплика - тот же
+# файл, открытый только для чтения: в режиме WAL ее читатели не ждут
+# пишущих. В тестах реплика - зеркало default.
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
-    }
+        "NAME": DATABASE_PATH,
+        "CONN_MAX_AGE": 600,
+        "OPTIONS": {"timeout": 20},
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": f"file:{quote(DATABASE_PATH)}?mode=ro",
+        "CONN_MAX_AGE": 600,
+        "OPTIONS": {"timeout": 20},
+        "TEST": {"MIRROR": "default"},
+    },
+}
+DATABASE_ROUTERS = ["core.db.ReadReplicaRouter"]
+DATABASE_READ_ALIAS = "replica"
+
+# PRAGMA для каждого нового соединения с SQLite
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    # Отрицательное значение - размер в КиБ
+    "cache_size": -64000,
 }
 
 
@@ -140,13 +202,21 @@ USE_TZ = True
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 STATIC_URL = "/static/"
-# STATIC_ROOT = os.path.join(BASE_DIR, "static")
+# collectstatic собирает статику с хешами в именах и сжатыми вариантами
+# (core.staticfiles); ее отдает StaticFilesMiddleware. Файлы без хеша в
+# имени кешируются на STATIC_MAX_AGE секунд.
+STATIC_ROOT = os.path.join(BASE_DIR, "collected_static")
+STATICFILES_STORAGE = "core.staticfiles.CompressedManifestStaticFilesStorage"
+STATIC_MAX_AGE = 60
 
 LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "posts:index"
 # LOGOUT_REDIRECT_URL = 'users:logout'
 
-EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+# Письма ставятся в фоновую очередь, воркер отправляет их бэкендом
+# TASKS_EMAIL_BACKEND
+EMAIL_BACKEND = "core.mail.QueuedEmailBackend"
+TASKS_EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 CSRF_FAILURE_VIEW = "core.views.csrf_failure"
@@ -154,9 +224,72 @@ CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Загрузки больше этого размера пишутся во временный файл, а не в память
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+# Размер файла проверяется первым, еще до записи очередного куска
+FILE_UPLOAD_HANDLERS = [
+    "posts.images.SizeLimitUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+# Картинки постов (posts.images): наибольшие размер файла и число
+# пикселей, ширина и формат пересохраненной картинки ("WEBP", если
+# Pillow собран с libwebp)
+POST_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40_000_000
+POST_IMAGE_MAX_WIDTH = 2000
+POST_IMAGE_FORMAT = "JPEG"
+POST_IMAGE_QUALITY = 82
+
+# Общий для всех воркеров кеш в файле SQLite. Через него же работает
+# хранилище ключей sorl-thumbnail (THUMBNAIL_CACHE = "default").
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "KEY_PREFIX": "index_page",
+        "BACKEND": "core.cache.SQLiteCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache.sqlite3"),
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+            "MMAP_SIZE": 64 * 1024 * 1024,
+        },
     }
 }
+
+# Лента подписок: авторам с большим числом подписчиков посты
+# не раскладываются по лентам, лента добирает их при чтении.
+FEED_FANOUT_LIMIT = 1000
+FEED_BATCH_SIZE = 500
+# Сколько секунд кешируется множество подписок пользователя; сигналы
+# сбрасывают его раньше
+FOLLOWS_CACHE_TIMEOUT = 60 * 60
+
+# Доля измеряемых запросов (0 - метрики выключены) и как часто процесс
+# сохраняет свои метрики в общий кеш для /metrics и metrics_report
+METRICS_SAMPLE_RATE = 0.1
+METRICS_FLUSH_INTERVAL = 10
+
+# Ограничение частоты записи (core.ratelimit): корзины токенов для
+# каждого пользователя и IP, "N/период" (s, m, h, d); methods - какие
+# методы ограничиваются, по умолчанию все
+RATE_LIMITS = {
+    "posts:post_create": {"methods": ["POST"], "user": "10/m", "ip": "60/m"},
+    "posts:post_edit": {"methods": ["POST"], "user": "20/m", "ip": "60/m"},
+    "posts:add_comment": {"methods": ["POST"], "user": "20/m", "ip": "120/m"},
+    "posts:profile_follow": {"user": "30/m", "ip": "120/m"},
+    "posts:profile_unfollow": {"user": "30/m", "ip": "120/m"},
+}
+
+# Фоновая очередь (core.tasks, команда run_tasks): задержка перед первым
+# повтором упавшей задачи, аренда задачи воркером в секундах, сколько
+# дней хранить выполненные задачи. С TASKS_ALWAYS_EAGER задачи
+# выполняются сразу после коммита, без воркера.
+TASKS_RETRY_BACKOFF = 10
+TASKS_LEASE = 300
+TASKS_KEEP_DONE_DAYS = 7
+TASKS_ALWAYS_EAGER = False
+
+# Снимки страниц для анонимных посетителей (core.snapshots, команда
+# build_snapshots): каталог с готовым HTML, который отдают
+# SnapshotMiddleware или веб-сервер, например
+# os.path.join(BASE_DIR, "snapshots"). None выключает снимки.
+SNAPSHOT_ROOT = None
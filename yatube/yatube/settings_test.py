@@ -0,0 +1,20 @@
+"""Настройки тестов: pytest (pytest.ini) и manage.py test.
+
+Кеш, загрузки и письма пишутся во временный каталог, который удаляется
+после прогона: cache.clear() в тестах не трогает общий кеш
+cache.sqlite3, а записи кеша не переходят в следующий прогон.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+from yatube.settings import *  # noqa: F401,F403
+from yatube.settings import CACHES
+
+TEST_DIR = tempfile.mkdtemp(prefix="yatube-test-")
+atexit.register(shutil.rmtree, TEST_DIR, ignore_errors=True)
+
+CACHES["default"]["LOCATION"] = os.path.join(TEST_DIR, "cache.sqlite3")
+MEDIA_ROOT = os.path.join(TEST_DIR, "media")
+EMAIL_FILE_PATH = os.path.join(TEST_DIR, "sent_emails")